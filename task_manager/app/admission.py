@@ -0,0 +1,157 @@
+# app/admission.py
+import asyncio
+from collections import deque
+from starlette.responses import JSONResponse
+from app.config import ADMISSION_LIMITS, ADMISSION_QUEUE_TIMEOUT, ADMISSION_RETRY_AFTER, ADMISSION_EXEMPT
+
+#kontrola przyjmowania requestow: przy skoku ruchu nadmiarowe requesty sa odrzucane od razu
+#(429 przy pelnej kolejce, 503 po zbyt dlugim czekaniu) zamiast czekac na polaczenie z puli
+#i blokade SQLite, az opoznienie wszystkich urosnie do timeoutow
+#stan zmieniany tylko z petli zdarzen, wiec bez blokad
+
+
+class ConcurrencyLimiter:
+    def __init__(self, name: str, limit: int, max_queue: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self._waiters = deque()
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "timeout": 0}
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    #None = request przyjety (trzeba wywolac release), inaczej powod odrzucenia
+    async def acquire(self) -> str | None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return None
+        if len(self._waiters) >= self.max_queue:
+            self.rejected["queue_full"] += 1
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            #miejsce moglo przyjsc razem z timeoutem - wtedy request jest przyjety
+            if not (waiter.done() and not waiter.cancelled()):
+                self._discard(waiter)
+                self.rejected["timeout"] += 1
+                return "timeout"
+        except asyncio.CancelledError:
+            #klient rozlaczyl sie w kolejce; miejsce juz przekazane trzeba oddac dalej
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+        self.admitted += 1
+        return None
+
+    #miejsce przechodzi na najdluzej czekajacy request (FIFO), active bez zmian
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _discard(self, waiter):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queue_depth": self.queue_depth,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
+
+
+#"* GET=20/200, /tasks *=5/50" -> [("*", "GET", 20, 200), ("/tasks", "*", 5, 50)]
+def parse_admission_limits(spec: str) -> list:
+    rules = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            key, value = entry.split("=")
+            router, method = key.split()
+            limit, max_queue = (int(number) for number in value.split("/"))
+        except ValueError:
+            raise ValueError(f"Invalid admission rule {entry!r}, expected '<router> <METHOD>=<limit>/<queue>'")
+        rules.append((router.rstrip("/") or "/", method.upper(), limit, max_queue))
+    return rules
+
+
+class AdmissionControl:
+    def __init__(self, rules: list, timeout: float, exempt: tuple):
+        self.exempt = exempt
+        self.limiters = {
+            (router, method): ConcurrencyLimiter(f"{router} {method}", limit, max_queue, timeout)
+            for router, method, limit, max_queue in rules
+        }
+
+    #najbardziej szczegolowa regula: konkretny router przed *, konkretna metoda przed *
+    def limiter_for(self, method: str, path: str) -> ConcurrencyLimiter | None:
+        if path.startswith(self.exempt):
+            return None
+        router = "/" + path.strip("/").split("/", 1)[0]
+        for key in ((router, method), (router, "*"), ("*", method), ("*", "*")):
+            limiter = self.limiters.get(key)
+            if limiter is not None:
+                return limiter
+        return None
+
+    def stats(self) -> dict:
+        return {limiter.name: limiter.stats() for limiter in self.limiters.values()}
+
+
+admission = AdmissionControl(
+    parse_admission_limits(ADMISSION_LIMITS),
+    ADMISSION_QUEUE_TIMEOUT,
+    tuple(path.strip() for path in ADMISSION_EXEMPT.split(",") if path.strip()),
+)
+
+_REJECTIONS = {
+    "queue_full": (429, "Too many concurrent requests, retry later"),
+    "timeout": (503, "Server busy, retry later"),
+}
+
+
+#middleware: limit rownoleglych requestow per regula; miejsce zajete do konca odpowiedzi
+#(tez strumieniowej), dlatego strumienie SSE sa wylaczone z limitow (ADMISSION_EXEMPT)
+class AdmissionMiddleware:
+    def __init__(self, app, control: AdmissionControl = admission):
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        limiter = self.control.limiter_for(scope["method"], scope["path"])
+        if limiter is None:
+            return await self.app(scope, receive, send)
+
+        reason = await limiter.acquire()
+        if reason is not None:
+            status, detail = _REJECTIONS[reason]
+            response = JSONResponse(
+                {"detail": detail}, status_code=status, headers={"Retry-After": str(ADMISSION_RETRY_AFTER)}
+            )
+            return await response(scope, receive, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
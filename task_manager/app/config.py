@@ -0,0 +1,85 @@
+# app/config.py
+import os
+
+#ustawienia aplikacji nadpisywane zmiennymi srodowiskowymi
+
+#cache odczytow projektow i userow (rozmiar = max liczba wpisow, ttl w sekundach)
+PROJECT_CACHE_SIZE = int(os.getenv("PROJECT_CACHE_SIZE", "1024"))
+PROJECT_CACHE_TTL = float(os.getenv("PROJECT_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+
+#hashowanie hasel (scrypt) w osobnej puli watkow, zeby nie blokowac petli zdarzen
+#n = 2**17 (zalecenie OWASP dla r=8, p=1) - 128 MiB pamieci na hash, razy PASSWORD_HASH_WORKERS;
+#zmiana n dotyczy nowych hashy, zapisane weryfikowane sa z wlasnym n
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", str(2**17)))
+
+#import userow - liczba wierszy w jednej paczce INSERT
+USER_IMPORT_BATCH_SIZE = int(os.getenv("USER_IMPORT_BATCH_SIZE", "500"))
+
+#profilowanie zapytan (debug): wlaczone dla wszystkich requestow albo per request naglowkiem
+QUERY_PROFILING = os.getenv("QUERY_PROFILING", "0") == "1"
+QUERY_PROFILE_HEADER = os.getenv("QUERY_PROFILE_HEADER", "X-Query-Profile")
+#od ilu powtorzen tego samego ksztaltu zapytania zglaszac podejrzenie N+1
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "3"))
+
+#zadania w tle: liczba workerow, katalog na pliki (uploady importu, wyniki eksportu)
+#i minimalny odstep miedzy zapisami postepu do bazy (sekundy)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_FILES_DIR = os.getenv("JOB_FILES_DIR", "./job_files")
+JOB_PROGRESS_INTERVAL = float(os.getenv("JOB_PROGRESS_INTERVAL", "0.5"))
+#wlasciciel zadania odswieza heartbeat co JOB_HEARTBEAT_INTERVAL sekund; zadanie running bez
+#heartbeatu od JOB_HEARTBEAT_TIMEOUT sekund (proces padl) wraca do kolejki
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "5"))
+JOB_HEARTBEAT_TIMEOUT = float(os.getenv("JOB_HEARTBEAT_TIMEOUT", "30"))
+#masowa zmiana statusu w zadaniu - liczba taskow na jedna transakcje
+JOB_BULK_STATUS_CHUNK = int(os.getenv("JOB_BULK_STATUS_CHUNK", "1000"))
+
+#zdarzenia zmian taskow (SSE): pojemnosc bufora na klienta i odstep komentarzy keep-alive (sekundy)
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "256"))
+EVENT_KEEPALIVE = float(os.getenv("EVENT_KEEPALIVE", "15"))
+
+#grupowy commit zapisow taskow (opt-in): okno zbierania w sekundach i maksymalny rozmiar paczki
+WRITE_BATCHING = os.getenv("WRITE_BATCHING", "0") == "1"
+WRITE_BATCH_WINDOW = float(os.getenv("WRITE_BATCH_WINDOW", "0.002"))
+WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", "100"))
+
+#baza danych: sqlite+aiosqlite (domyslnie plik ./test.db) albo postgresql+asyncpg
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./test.db")
+DB_ECHO = os.getenv("DB_ECHO", "0") == "1"
+#pula polaczen: stale polaczenia, dodatkowe ponad pule, czas czekania na wolne (sekundy)
+#i wiek, po ktorym polaczenie jest otwierane na nowo (sekundy, -1 = bez limitu)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+#cache skompilowanego SQL w SQLAlchemy (liczba zapytan) i cache przygotowanych zapytan
+#sterownika per polaczenie (asyncpg: 0 za pgbouncerem w trybie transaction)
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "500"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+#SQLite: pragmy ustawiane na kazdym nowym polaczeniu (foreign_keys zawsze ON)
+#WAL - odczyty nie czekaja na zapis; synchronous=NORMAL w WAL nie psuje bazy przy awarii,
+#najwyzej traci ostatnie commity; cache_size ujemny = KiB na polaczenie; mmap_size w bajtach
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 2**20)))
+
+#osobna pula polaczen tylko do odczytu dla GET; pusty URL = ta sama baza co DATABASE_URL
+#(w Postgresie mozna tu podac replike)
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", "")
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "10"))
+
+#kontrola przyjmowania requestow (opt-in): limity rownoleglych requestow i dlugosc kolejki czekajacych,
+#regula "<router> <METODA>=<limit>/<kolejka>" (router to np. /tasks, * = dowolny), pusto = wylaczone
+#request trafia do najbardziej szczegolowej reguly; kazda regula ma wlasny limit, np. "* GET=16/32, * *=8/16"
+#z WRITE_BATCHING=1 limit zapisow ogranicza tez rozmiar paczki - powinien byc co najmniej WRITE_BATCH_MAX,
+#inaczej paczki sa male, a nadmiar dostaje 429 zamiast trafic do wspolnego commitu
+ADMISSION_LIMITS = os.getenv("ADMISSION_LIMITS", "")
+#maksymalny czas czekania w kolejce (sekundy) i naglowek Retry-After odrzuconych (sekundy)
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+#sciezki bez limitu (prefiksy): dlugie strumienie SSE i diagnostyka
+ADMISSION_EXEMPT = os.getenv("ADMISSION_EXEMPT", "/tasks/events,/metrics,/cache/stats,/docs,/redoc,/openapi.json")
@@ -1,17 +1,116 @@
 # app/db.py
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from app.config import (
+    DATABASE_URL, DATABASE_READ_URL, DB_ECHO, DB_POOL_SIZE, DB_READ_POOL_SIZE, DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_QUERY_CACHE_SIZE, DB_STATEMENT_CACHE_SIZE,
+    SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_CACHE_SIZE, SQLITE_MMAP_SIZE,
+)
+from app.metrics import instrument_engine
+from app.profiling import profile_engine
+
+#sterowniki asynchroniczne dla URL podanych bez sterownika (postgresql://..., sqlite:///...)
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def _async_url(url: str):
+    url = make_url(url)
+    return url.set(drivername=_ASYNC_DRIVERS.get(url.drivername, url.drivername))
+
+
+def _sqlite_in_memory(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+#ustawienia silnika z konfiguracji; cache przygotowanych zapytan ma inna nazwe w kazdym sterowniku
+def _engine_options(url, pool_size: int, read_only: bool) -> dict:
+    options = {"echo": DB_ECHO, "query_cache_size": DB_QUERY_CACHE_SIZE}
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"cached_statements": DB_STATEMENT_CACHE_SIZE}
+        #baza w pamieci dziala na jednym polaczeniu (StaticPool) - bez ustawien puli
+        if _sqlite_in_memory(url):
+            return options
+        #plik: pula zamiast domyslnego NullPool (nowe polaczenie i pusty cache zapytan w kazdej sesji)
+        options["poolclass"] = AsyncAdaptedQueuePool
+    else:
+        options["connect_args"] = {"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+        if read_only:
+            options["connect_args"]["server_settings"] = {"default_transaction_read_only": "on"}
+    options.update(
+        pool_size=pool_size,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+
+#pragmy SQLite na kazdym nowym polaczeniu; polaczenia do odczytu dodatkowo z query_only
+def _sqlite_pragmas(read_only: bool) -> list:
+    pragmas = [
+        f"journal_mode = {SQLITE_JOURNAL_MODE}",
+        f"synchronous = {SQLITE_SYNCHRONOUS}",
+        f"cache_size = {SQLITE_CACHE_SIZE}",
+        f"mmap_size = {SQLITE_MMAP_SIZE}",
+        "foreign_keys = ON",
+    ]
+    if read_only:
+        pragmas.append("query_only = ON")
+    return pragmas
+
+
+def _create_engine(url, pool_size: int, read_only: bool = False):
+    engine = create_async_engine(url, future=True, **_engine_options(url, pool_size, read_only))
+    if url.get_backend_name() == "sqlite":
+        pragmas = _sqlite_pragmas(read_only)
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def _apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(f"PRAGMA {pragma}")
+            cursor.close()
+
+    #czas i liczba wierszy kazdego zapytania (eksportowane na /metrics)
+    instrument_engine(engine)
+    #licznik zapytan per request (tryb debug, patrz app/profiling.py)
+    profile_engine(engine)
+    return engine
+
 
 #asynchroniczna baza danych
-DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+DATABASE_URL = _async_url(DATABASE_URL)
 #asynchroniczny silnik
-engine = create_async_engine(DATABASE_URL, future=True, echo=False)
+engine = _create_engine(DATABASE_URL, DB_POOL_SIZE)
+#osobny silnik tylko do odczytu dla GET - zapytania list nie czekaja na wolne polaczenie
+#w puli zapisow; baza SQLite w pamieci istnieje tylko w jednym polaczeniu, wiec tam wspolny
+if _sqlite_in_memory(DATABASE_URL):
+    read_engine = engine
+else:
+    read_engine = _create_engine(_async_url(DATABASE_READ_URL or DATABASE_URL), DB_READ_POOL_SIZE, read_only=True)
 #tworzenie sesji
 AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+ReadSessionLocal = sessionmaker(bind=read_engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
 #funkcja do uzyskania sesji DB
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+#sesja tylko do odczytu (trasy GET)
+async def get_read_db():
+    async with ReadSessionLocal() as session:
+        yield session
+
+#INSERT z obsluga ON CONFLICT (upsert) dla dialektu uzywanej bazy
+def dialect_insert(model):
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
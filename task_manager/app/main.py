@@ -1,6 +1,21 @@
+import time
+
+#poczatek startu procesu (importy aplikacji wliczone w czas startu)
+_BOOT_STARTED = time.perf_counter()
+
 from fastapi import FastAPI
-from app.routers import users, projects, tasks
-from app.db import engine, Base
+from fastapi.responses import PlainTextResponse
+from app.routers import users, projects, tasks, jobs
+from app.db import engine
+from app.migrations import run_migrations
+from app.admission import AdmissionMiddleware, admission
+from app.metrics import MetricsMiddleware, render_metrics
+from app.profiling import QueryProfilerMiddleware
+from app.services.cache import cache_stats
+from app.services.users_service import shutdown_password_pool
+from app.services.jobs_service import job_queue
+from app.services.events import task_events
+from app.services.write_batcher import write_batcher, start_write_batcher
 from contextlib import asynccontextmanager
 import logging
 
@@ -10,13 +25,72 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    #jeden odczyt wersji schematu, migracje tylko gdy baza jest starsza niz kod
+    imports_done = time.perf_counter()
+    version, applied = await run_migrations(engine)
+    ready = time.perf_counter()
+    app.state.startup_seconds = ready - _BOOT_STARTED
+    logger.info(
+        "Startup finished in %.1f ms (imports %.1f ms, schema check %.1f ms), schema version %d, applied: %s",
+        (ready - _BOOT_STARTED) * 1000, (imports_done - _BOOT_STARTED) * 1000, (ready - imports_done) * 1000,
+        version, ", ".join(applied) or "none",
+    )
+    #workery zadan w tle (eksporty, importy, masowe zmiany)
+    await job_queue.start()
+    #grupowy commit zapisow, gdy WRITE_BATCHING=1
+    start_write_batcher()
     yield  #przekazuje kontrole do fastApi
+    await job_queue.stop()
+    await write_batcher.stop()
+    shutdown_password_pool()
 
 app = FastAPI(lifespan=lifespan)
+#limity rownoleglych requestow z kolejka (wewnatrz metryk - czas w kolejce i odrzucenia widac w histogramie)
+app.add_middleware(AdmissionMiddleware)
+#histogram czasu odpowiedzi per trasa
+app.add_middleware(MetricsMiddleware)
+#liczba zapytan SQL per request i wykrywanie N+1 (X-Query-Profile: 1)
+app.add_middleware(QueryProfilerMiddleware)
 
 #rejestrowanie routerow
 app.include_router(users.router)
 app.include_router(projects.router)
 app.include_router(tasks.router)
+app.include_router(jobs.router)
+
+#liczniki trafien/chybien cache projektow i userow
+@app.get("/cache/stats", tags=["Diagnostics"])
+async def get_cache_stats():
+    return cache_stats()
+
+#metryki w formacie Prometheus (requesty, zapytania SQL, kontrola przyjmowania, cache)
+@app.get("/metrics", tags=["Diagnostics"], response_class=PlainTextResponse)
+async def get_metrics():
+    extra = [
+        "# TYPE app_startup_seconds gauge", f"app_startup_seconds {getattr(app.state, 'startup_seconds', 0)}",
+        "# TYPE jobs_queue_depth gauge", f"jobs_queue_depth {job_queue.depth()}",
+    ]
+    events = task_events.stats()
+    extra += [
+        "# TYPE task_events_subscribers gauge", f"task_events_subscribers {events['subscribers']}",
+        "# TYPE task_events_published_total counter", f"task_events_published_total {events['published']}",
+        "# TYPE task_events_overflows_total counter", f"task_events_overflows_total {events['overflows']}",
+    ]
+    writes = write_batcher.stats()
+    extra += [
+        "# TYPE write_batches_total counter", f"write_batches_total {writes['batches']}",
+        "# TYPE write_batch_operations_total counter", f"write_batch_operations_total {writes['operations']}",
+    ]
+    limits = admission.stats()
+    for metric, kind, field in (("admission_active", "gauge", "active"), ("admission_queue_depth", "gauge", "queue_depth"), ("admission_admitted_total", "counter", "admitted")):
+        extra.append(f"# TYPE {metric} {kind}")
+        extra += [f'{metric}{{rule="{rule}"}} {stats[field]}' for rule, stats in limits.items()]
+    extra.append("# TYPE admission_rejected_total counter")
+    extra += [
+        f'admission_rejected_total{{rule="{rule}",reason="{reason}"}} {count}'
+        for rule, stats in limits.items() for reason, count in stats["rejected"].items()
+    ]
+    for metric, kind, field in (("cache_hits_total", "counter", "hits"), ("cache_misses_total", "counter", "misses"), ("cache_size", "gauge", "size")):
+        extra.append(f"# TYPE {metric} {kind}")
+        extra += [f'{metric}{{cache="{cache}"}} {stats[field]}' for cache, stats in cache_stats().items()]
+    return PlainTextResponse(render_metrics(extra), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,179 @@
+# app/metrics.py
+import logging
+import re
+import time
+from bisect import bisect_left
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+#metryki w formacie Prometheus bez zewnetrznych zaleznosci
+#aktualizowane tylko z watku petli zdarzen (middleware i eventy silnika przez greenlet),
+#wiec wystarcza zwykle slowniki bez blokad
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: tuple, buckets: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  #wartosci etykiet -> [liczniki kubelkow..., suma, liczba]
+
+    def observe(self, label_values: tuple, value: float):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+        #kubelki trzymane nieskumulowane, sumowane dopiero przy eksporcie
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._series.items()):
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-2]}")
+            lines.append(f"{self.name}_count{{{labels}}} {series[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+
+    def inc(self, label_values: tuple, amount: float = 1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request duration by route", ("method", "route", "status"), REQUEST_BUCKETS
+)
+db_statement_duration = Histogram(
+    "db_statement_duration_seconds", "SQL statement execution time", ("statement",), DB_BUCKETS
+)
+db_statement_rows = Counter(
+    "db_statement_rows_total", "Rows returned (SELECT, RETURNING) or changed by SQL statements", ("statement",)
+)
+db_statement_rows_unknown = Counter(
+    "db_statement_rows_unknown_total", "SQL statements returning rows whose row count is unknown", ("statement",)
+)
+
+
+#middleware ASGI mierzacy czas requestu per szablon trasy (np. /tasks/{task_id})
+#czysty ASGI zamiast BaseHTTPMiddleware - nie buforuje odpowiedzi strumieniowych
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            request_duration.observe(
+                (scope["method"], route_path, str(status[0])), time.perf_counter() - start
+            )
+
+
+_TABLE_RE = re.compile(
+    r"\b(?:FROM|INTO|UPDATE|TABLE|JOIN|ON)\s+(?:IF\s+NOT\s+EXISTS\s+)?\"?(?!OF\b|IF\b)(\w+)", re.IGNORECASE
+)
+
+
+#etykieta zapytania o malej licznosci: operacja + pierwsza tabela, np. "SELECT tasks"
+def statement_label(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    operation = words[0].upper() if words else "?"
+    match = _TABLE_RE.search(statement)
+    return f"{operation} {match.group(1)}" if match else operation
+
+
+#liczba wierszy zapytania: zwroconych, gdy zapytanie zwraca wiersze, inaczej zmienionych (rowcount)
+#dla zapytan zwracajacych wiersze aiosqlite podaje rowcount -1 (asyncpg liczbe z tagu "SELECT n"),
+#ale oba adaptery async pobieraja caly wynik do bufora _rows jeszcze w execute - liczymy ten bufor;
+#to atrybut prywatny adapterow SQLAlchemy (przypiety testem w tests/test_metrics.py) - gdy go nie ma,
+#albo kursor jest strumieniowy (stream_results, wynik czytany pozniej), zwracamy ROWS_UNKNOWN
+#None = zapytanie bez wierszy i bez rowcount (np. DDL)
+ROWS_UNKNOWN = -1
+_missing_buffer_warned = set()
+
+
+def _statement_rows(cursor, context) -> int | None:
+    if cursor.description is None:
+        return cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+    if context is not None and context.execution_options.get("stream_results"):
+        return ROWS_UNKNOWN
+    rows = getattr(cursor, "_rows", None)
+    if rows is None:
+        cursor_type = type(cursor).__name__
+        if cursor_type not in _missing_buffer_warned:
+            _missing_buffer_warned.add(cursor_type)
+            logger.warning("DB cursor %s has no result buffer, row counts exported as unknown", cursor_type)
+        return ROWS_UNKNOWN
+    return len(rows)
+
+
+#podpiecie pod silnik: czas kazdego zapytania i liczba zwroconych/zmienionych wierszy
+def instrument_engine(engine):
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["metrics_start"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("metrics_start", time.perf_counter())
+        label = (statement_label(statement),)
+        db_statement_duration.observe(label, elapsed)
+        rows = _statement_rows(cursor, context)
+        if rows == ROWS_UNKNOWN:
+            db_statement_rows_unknown.inc(label)
+        elif rows is not None:
+            db_statement_rows.inc(label, rows)
+
+
+#caly rejestr w formacie tekstowym Prometheusa
+def render_metrics(extra_lines: list | None = None) -> str:
+    lines = []
+    for metric in (request_duration, db_statement_duration, db_statement_rows, db_statement_rows_unknown):
+        lines.extend(metric.render())
+    lines.extend(extra_lines or [])
+    return "\n".join(lines) + "\n"
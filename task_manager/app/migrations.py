@@ -0,0 +1,114 @@
+# app/migrations.py
+from sqlalchemy import Column, Integer, MetaData, Table, inspect, insert, select, text, update
+from app.db import Base
+#wszystkie modele musza byc zarejestrowane w Base.metadata przed migracja
+from app.models import user, projects, task, project_stats, task_search, job
+
+#wersjonowany schemat bazy zamiast create_all przy kazdym starcie:
+#start robi jeden odczyt wersji, a migracje uruchamia tylko gdy baza jest starsza niz kod
+#nowa zmiana schematu = nowa funkcja dopisana na koncu MIGRATIONS (numery rosnace, bez zmian starych)
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+
+
+#1: brakujace tabele (nowa baza albo tabele dodane po jej utworzeniu);
+#triggery licznikow i indeks FTS tworza listenery after_create z modeli
+def _create_tables(connection):
+    Base.metadata.create_all(connection)
+
+
+#2: kolumna version w tabelach z baz sprzed ETagow
+def _add_version_columns(connection):
+    inspector = inspect(connection)
+    for table_name in ("users", "projects", "tasks"):
+        columns = {column["name"] for column in inspector.get_columns(table_name)}
+        if "version" not in columns:
+            connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+
+#3: indeksy dodane do modeli juz istniejacych tabel (create_all pomija istniejace tabele)
+def _create_missing_indexes(connection):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+#4: tabela zadan w tle
+def _create_jobs_table(connection):
+    Base.metadata.create_all(connection, tables=[job.Job.__table__])
+
+
+#5: triggery licznikow bez upsertu przy zerowej zmianie (Postgres; w SQLite bez zmian)
+def _refresh_task_count_triggers(connection):
+    project_stats.create_task_count_triggers(connection)
+
+
+#6: wlasciciel i heartbeat zadan w tle
+def _add_job_heartbeat_columns(connection):
+    columns = {column["name"] for column in inspect(connection).get_columns(job.Job.__tablename__)}
+    for column in (job.Job.__table__.c.worker_id, job.Job.__table__.c.heartbeat_at):
+        if column.name not in columns:
+            column_type = column.type.compile(connection.dialect)
+            connection.execute(text(f"ALTER TABLE jobs ADD COLUMN {column.name} {column_type}"))
+
+
+#7: jednokolumnowe indeksy tasks.user_id/project_id (pokryte przez indeksy zlozone)
+def _drop_redundant_task_indexes(connection):
+    for index_name in ("ix_tasks_user_id", "ix_tasks_project_id"):
+        connection.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+
+
+MIGRATIONS = [
+    (1, "create tables", _create_tables),
+    (2, "add version columns", _add_version_columns),
+    (3, "create missing indexes", _create_missing_indexes),
+    (4, "create jobs table", _create_jobs_table),
+    (5, "refresh task count triggers", _refresh_task_count_triggers),
+    (6, "add job heartbeat columns", _add_job_heartbeat_columns),
+    (7, "drop redundant task indexes", _drop_redundant_task_indexes),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+#klucz blokady doradczej migracji w Postgresie (dowolna stala)
+_MIGRATION_LOCK_KEY = 7_210_018
+
+
+def _read_version(connection) -> int:
+    if not inspect(connection).has_table(schema_version.name):
+        return 0
+    return connection.execute(select(schema_version.c.version)).scalar() or 0
+
+
+def _apply_pending(connection) -> list:
+    #Postgres nie blokuje pustej tabeli pierwszym zapisem - blokada doradcza do konca transakcji
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _MIGRATION_LOCK_KEY})
+    schema_version.create(connection, checkfirst=True)
+    #pierwszy zapis w transakcji blokuje baze - rownolegle startujacy proces czeka tutaj,
+    #a po odblokowaniu widzi juz nowa wersje i nie powtarza migracji
+    if not connection.execute(update(schema_version).values(version=schema_version.c.version)).rowcount:
+        connection.execute(insert(schema_version).values(id=1, version=0))
+    current = connection.execute(select(schema_version.c.version)).scalar()
+
+    applied = []
+    for version, name, migrate in MIGRATIONS:
+        if version > current:
+            migrate(connection)
+            applied.append(f"{version}: {name}")
+    connection.execute(update(schema_version).values(version=LATEST_VERSION))
+    return applied
+
+
+#sprawdzenie wersji schematu i ewentualne migracje; zwraca (wersja, lista zastosowanych migracji)
+async def run_migrations(engine) -> tuple[int, list]:
+    async with engine.connect() as conn:
+        current = await conn.run_sync(_read_version)
+    if current >= LATEST_VERSION:
+        return current, []
+    async with engine.begin() as conn:
+        applied = await conn.run_sync(_apply_pending)
+    return LATEST_VERSION, applied
@@ -0,0 +1,28 @@
+# app/models/job.py
+from datetime import datetime, timezone
+from app.db import Base
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+#zadanie w tle (eksport, import, masowa zmiana statusu) - stan trzymany w bazie,
+#wiec status i wynik sa dostepne po zakonczeniu requestu i po restarcie procesu
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="queued", index=True)  #queued/running/done/failed
+    params = Column(JSON, nullable=True)
+    progress = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=_now)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    #proces wykonujacy zadanie i jego ostatni heartbeat (przejecie zadan po padnietym procesie)
+    worker_id = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
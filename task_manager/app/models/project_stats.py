@@ -0,0 +1,116 @@
+# app/models/project_stats.py
+from sqlalchemy import Column, Integer, String, ForeignKey, event
+from app.db import Base
+
+
+#licznik taskow per projekt i status (statystyki projektu bez skanowania taskow)
+class ProjectTaskCount(Base):
+    __tablename__ = "project_task_counts"
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+#liczniki utrzymuja triggery na tasks - dzialaja w tej samej transakcji co zapis taska,
+#wiec obejmuja tez zapisy masowe i nie dokladaja zapytan do INSERT/UPDATE ... RETURNING
+#taski bez projektu albo bez statusu nie sa liczone
+_SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_count_insert AFTER INSERT ON tasks
+    WHEN NEW.project_id IS NOT NULL AND NEW.status IS NOT NULL
+    BEGIN
+        INSERT INTO project_task_counts (project_id, status, count) VALUES (NEW.project_id, NEW.status, 1)
+        ON CONFLICT (project_id, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_count_update AFTER UPDATE OF project_id, status ON tasks
+    WHEN OLD.project_id IS NOT NEW.project_id OR OLD.status IS NOT NEW.status
+    BEGIN
+        UPDATE project_task_counts SET count = count - 1
+        WHERE project_id = OLD.project_id AND status = OLD.status;
+        INSERT INTO project_task_counts (project_id, status, count)
+        SELECT NEW.project_id, NEW.status, 1 WHERE NEW.project_id IS NOT NULL AND NEW.status IS NOT NULL
+        ON CONFLICT (project_id, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_count_delete AFTER DELETE ON tasks
+    BEGIN
+        UPDATE project_task_counts SET count = count - 1
+        WHERE project_id = OLD.project_id AND status = OLD.status;
+    END
+    """,
+]
+
+#Postgres: triggery per instrukcja z tabelami przejsciowymi - jedna zagregowana zmiana licznikow
+#na caly zapis masowy, zapisywana w kolejnosci (project_id, status), wiec rownolegle zapisy
+#blokuja wiersze licznikow w tej samej kolejnosci (trigger per wiersz dawal zakleszczenia)
+#grupy bez zmiany netto (np. edycja samego tytulu) sa pomijane - upsert z +0 blokowalby wiersz
+#licznika do commitu i szeregowal wszystkie zapisy taskow w tym samym (project_id, status);
+#zmniejszenie nieistniejacego licznika tez jest pomijane, jak UPDATE w triggerach SQLite
+_POSTGRES_COUNT_DELTA = """
+    INSERT INTO project_task_counts (project_id, status, count)
+    SELECT project_id, status, SUM(n) FROM ({rows}) AS d
+    WHERE project_id IS NOT NULL AND status IS NOT NULL
+    GROUP BY project_id, status
+    HAVING SUM(n) <> 0 AND (SUM(n) > 0 OR (project_id, status) IN (SELECT project_id, status FROM project_task_counts))
+    ORDER BY project_id, status
+    ON CONFLICT (project_id, status) DO UPDATE SET count = project_task_counts.count + EXCLUDED.count;
+"""
+_NEW_ROWS = "SELECT project_id, status, 1 AS n FROM new_tasks"
+_OLD_ROWS = "SELECT project_id, status, -1 AS n FROM old_tasks"
+
+_POSTGRES_TRIGGERS = [
+    f"""
+    CREATE OR REPLACE FUNCTION tasks_count_change() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {_POSTGRES_COUNT_DELTA.format(rows=_NEW_ROWS)}
+        ELSIF TG_OP = 'DELETE' THEN
+            {_POSTGRES_COUNT_DELTA.format(rows=_OLD_ROWS)}
+        ELSE
+            {_POSTGRES_COUNT_DELTA.format(rows=_NEW_ROWS + " UNION ALL " + _OLD_ROWS)}
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    #DROP + CREATE, bo CREATE OR REPLACE TRIGGER jest dopiero od Postgresa 14
+    "DROP TRIGGER IF EXISTS trg_tasks_count_insert ON tasks",
+    """
+    CREATE TRIGGER trg_tasks_count_insert AFTER INSERT ON tasks
+    REFERENCING NEW TABLE AS new_tasks FOR EACH STATEMENT EXECUTE FUNCTION tasks_count_change()
+    """,
+    "DROP TRIGGER IF EXISTS trg_tasks_count_update ON tasks",
+    """
+    CREATE TRIGGER trg_tasks_count_update AFTER UPDATE ON tasks
+    REFERENCING OLD TABLE AS old_tasks NEW TABLE AS new_tasks FOR EACH STATEMENT EXECUTE FUNCTION tasks_count_change()
+    """,
+    "DROP TRIGGER IF EXISTS trg_tasks_count_delete ON tasks",
+    """
+    CREATE TRIGGER trg_tasks_count_delete AFTER DELETE ON tasks
+    REFERENCING OLD TABLE AS old_tasks FOR EACH STATEMENT EXECUTE FUNCTION tasks_count_change()
+    """,
+]
+_TRIGGERS = {"sqlite": _SQLITE_TRIGGERS, "postgresql": _POSTGRES_TRIGGERS}
+
+
+#triggery licznikow dla dialektu polaczenia (powtorne wywolanie podmienia funkcje w Postgresie)
+def create_task_count_triggers(connection):
+    for ddl in _TRIGGERS.get(connection.dialect.name, ()):
+        connection.exec_driver_sql(ddl)
+
+
+#po create_all: triggery, a przy nowo tworzonej tabeli licznikow - przeliczenie istniejacych taskow
+@event.listens_for(Base.metadata, "after_create")
+def _create_task_count_triggers(target, connection, tables=(), **kw):
+    if connection.dialect.name not in _TRIGGERS:
+        return
+    create_task_count_triggers(connection)
+    if ProjectTaskCount.__table__ in tables:
+        connection.exec_driver_sql(
+            "INSERT INTO project_task_counts (project_id, status, count) "
+            "SELECT project_id, status, COUNT(*) FROM tasks "
+            "WHERE project_id IS NOT NULL AND status IS NOT NULL GROUP BY project_id, status"
+        )
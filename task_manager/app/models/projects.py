@@ -9,6 +9,8 @@ class Project(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
+    #licznik wersji podbijany przy kazdej zmianie (ETag)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     #relacja do tabelki task
     tasks = relationship("Task", back_populates="project")
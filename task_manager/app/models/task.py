@@ -1,7 +1,7 @@
 # app/models/task.py
 from sqlalchemy.orm import relationship
 from app.db import Base
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Index
 
 #model do DB taska
 class Task(Base):
@@ -9,9 +9,20 @@ class Task(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
-    status = Column(String, default="todo")
+    status = Column(String, default="todo", index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="SET NULL"), nullable=True)
+    #licznik wersji podbijany przy kazdej zmianie (ETag)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    #indeksy pod filtrowanie listy taskow (np. "otwarte taski usera X w projekcie Y")
+    #SQLite dokleja rowid do kazdego indeksu, wiec paginacja po id tez idzie z indeksu
+    #user_id i project_id bez osobnych indeksow - wyszukiwanie po nich (filtry, ON DELETE SET NULL)
+    #obsluguja prefiksy ponizszych indeksow zlozonych
+    __table_args__ = (
+        Index("ix_tasks_user_project_status", "user_id", "project_id", "status"),
+        Index("ix_tasks_project_status", "project_id", "status"),
+    )
 
     #relacja z tabelka userow
     user = relationship("User", back_populates="tasks")
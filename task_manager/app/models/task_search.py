@@ -0,0 +1,66 @@
+# app/models/task_search.py
+from sqlalchemy import event, literal_column
+from sqlalchemy.sql import column, table
+from app.db import Base
+
+#indeks pelnotekstowy FTS5 po tytule i opisie taskow (external content - tekst jest tylko w tasks)
+#nie jest modelem ORM, bo create_all zrobilby z niego zwykla tabele
+tasks_fts = table("tasks_fts", column("rowid"), column("rank"))
+
+_SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title, description, content='tasks', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    #synchronizacja z tasks triggerami, w tej samej transakcji co zapis taska
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_insert AFTER INSERT ON tasks
+    BEGIN
+        INSERT INTO tasks_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_delete AFTER DELETE ON tasks
+    BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_update AFTER UPDATE OF title, description ON tasks
+    BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        INSERT INTO tasks_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END
+    """,
+]
+
+#Postgres: zamiast FTS5 indeks GIN na wyrazeniu to_tsvector - bez triggerow, indeks aktualizuje sie sam
+#konfiguracja 'simple' jak unicode61: bez stemmingu i stop-slow (ale z rozroznianiem znakow diakrytycznych)
+#wyrazenie w zapytaniu musi byc identyczne z indeksowanym, inaczej planner nie uzyje indeksu
+_TSVECTOR_SQL = "to_tsvector('simple', coalesce({t}title, '') || ' ' || coalesce({t}description, ''))"
+tasks_tsvector = literal_column(_TSVECTOR_SQL.format(t="tasks."))
+
+_POSTGRES_FTS_DDL = [
+    f"CREATE INDEX IF NOT EXISTS ix_tasks_search ON tasks USING gin (({_TSVECTOR_SQL.format(t='')}))",
+]
+
+
+#po create_all: indeks FTS i triggery; nowy indeks budowany od razu z istniejacych taskow
+@event.listens_for(Base.metadata, "after_create")
+def _create_task_search_index(target, connection, **kw):
+    if connection.dialect.name == "postgresql":
+        for ddl in _POSTGRES_FTS_DDL:
+            connection.exec_driver_sql(ddl)
+        return
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'"
+    ).first()
+    for ddl in _SQLITE_FTS_DDL:
+        connection.exec_driver_sql(ddl)
+    if not exists:
+        connection.exec_driver_sql("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
@@ -10,6 +10,8 @@ class User(Base):
     name = Column(String, nullable=False)
     email = Column(String, unique=True, nullable=False)
     password = Column(String, nullable=False)
+    #licznik wersji podbijany przy kazdej zmianie (ETag)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     #relacja z tabela taskow
     tasks = relationship("Task", back_populates="user")
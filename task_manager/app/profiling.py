@@ -0,0 +1,107 @@
+# app/profiling.py
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from app.config import QUERY_PROFILING, QUERY_PROFILE_HEADER, QUERY_REPEAT_THRESHOLD
+
+#licznik zapytan SQL per request i wykrywanie N+1 (tryb debug)
+#kontekst przechodzi do eventow silnika, bo greenlet SQLAlchemy dziedziczy contextvars
+
+logger = logging.getLogger(__name__)
+
+_current_profile: ContextVar["QueryProfile | None"] = ContextVar("query_profile", default=None)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+#listy parametrow o zmiennej dlugosci (IN (?, ?, ...), VALUES (...), (...)) zwijane do jednej postaci
+_PARAM = r"(?:\?|\$\d+(?:::\w+)?)"  #SQLite: ?, asyncpg: $1 albo $1::INTEGER
+_PARAM_LIST_RE = re.compile(rf"\((?:\s*{_PARAM}\s*,)*\s*{_PARAM}\s*\)|\(\s*__\[POSTCOMPILE_\w+\]\s*\)")
+_VALUES_RE = re.compile(r"VALUES\s*\(\?\.\.\.\)(?:\s*,\s*\(\?\.\.\.\))+", re.IGNORECASE)
+
+
+#ksztalt zapytania: ten sam SQL z innymi parametrami daje ten sam ksztalt
+def statement_shape(statement: str) -> str:
+    shape = _WHITESPACE_RE.sub(" ", statement).strip()
+    shape = _PARAM_LIST_RE.sub("(?...)", shape)
+    return _VALUES_RE.sub("VALUES (?...)", shape)
+
+
+class QueryProfile:
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    #ksztalty powtorzone co najmniej threshold razy - typowy objaw N+1
+    def repeated(self, threshold: int = QUERY_REPEAT_THRESHOLD) -> dict:
+        shapes = Counter(statement_shape(statement) for statement in self.statements)
+        return {shape: count for shape, count in shapes.items() if count >= threshold}
+
+
+#zliczanie zapytan w bloku, np. w testach:
+#   with profile_queries() as profile: await client.get("/tasks/")
+#   assert profile.count <= 2
+@contextmanager
+def profile_queries():
+    profile = QueryProfile()
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+#podpiecie pod silnik - bez aktywnego profilu koszt to jeden odczyt contextvar
+def profile_engine(engine):
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _record_statement(conn, cursor, statement, parameters, context, executemany):
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.statements.append(statement)
+
+
+def _profiling_requested(scope) -> bool:
+    if QUERY_PROFILING:
+        return True
+    header = QUERY_PROFILE_HEADER.lower().encode()
+    return any(name == header and value not in (b"", b"0") for name, value in scope["headers"])
+
+
+#middleware: wlaczany ustawieniem QUERY_PROFILING lub naglowkiem X-Query-Profile: 1,
+#zwraca liczbe zapytan w X-Query-Count i liczbe powtarzajacych sie ksztaltow w X-Query-Repeated
+class QueryProfilerMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _profiling_requested(scope):
+            return await self.app(scope, receive, send)
+
+        with profile_queries() as profile:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    #odpowiedzi strumieniowe licza tylko zapytania sprzed wyslania naglowkow
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-query-count", str(profile.count).encode()),
+                        (b"x-query-repeated", str(len(profile.repeated())).encode()),
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                _log_profile(scope, profile)
+
+
+def _log_profile(scope, profile: QueryProfile):
+    logger.info("%s %s: %d queries", scope["method"], scope["path"], profile.count)
+    for statement in profile.statements:
+        logger.info("  %s", _WHITESPACE_RE.sub(" ", statement).strip())
+    for shape, count in profile.repeated().items():
+        logger.warning("Possible N+1 in %s %s: %d x %s", scope["method"], scope["path"], count, shape)
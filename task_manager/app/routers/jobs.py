@@ -0,0 +1,41 @@
+# app/routers/jobs.py
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import get_db, get_read_db
+from app.schemas.job import JobResponse
+from app.schemas.task import TaskBulkStatusUpdate
+from app.services.jobs_service import enqueue_job, get_job_by_id, get_job_result_file, spool_upload
+from app.services.tasks_service import bulk_status_conditions
+
+#router zadan w tle - POST zwraca od razu (202) id zadania, stan pod GET /jobs/{job_id}
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+#eksport wszystkich taskow do pliku NDJSON (pobranie: GET /jobs/{job_id}/result)
+@router.post("/tasks/export", response_model=JobResponse, status_code=202)
+async def start_tasks_export(db: AsyncSession = Depends(get_db)):
+    return await enqueue_job(db=db, kind="tasks_export", params={})
+
+#masowa zmiana statusu paczkami w tle
+@router.post("/tasks/bulk-status", response_model=JobResponse, status_code=202)
+async def start_tasks_bulk_status(data: TaskBulkStatusUpdate, db: AsyncSession = Depends(get_db)):
+    bulk_status_conditions(data)  #bledne zapytanie (brak filtra) odrzucone od razu, a nie w zadaniu
+    return await enqueue_job(db=db, kind="tasks_bulk_status", params=data.model_dump())
+
+#import userow (CSV albo NDJSON jak w POST /users/import), raport w wyniku zadania
+@router.post("/users/import", response_model=JobResponse, status_code=202)
+async def start_users_import(request: Request, db: AsyncSession = Depends(get_db)):
+    file = await spool_upload(request.stream(), "users_import")
+    params = {"file": file, "content_type": request.headers.get("content-type")}
+    return await enqueue_job(db=db, kind="users_import", params=params)
+
+#stan, postep i wynik zadania
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_read_db)):
+    return await get_job_by_id(db=db, job_id=job_id)
+
+#plik wynikowy zakonczonego eksportu
+@router.get("/{job_id}/result")
+async def download_job_result(job_id: int, db: AsyncSession = Depends(get_read_db)):
+    path = await get_job_result_file(db=db, job_id=job_id)
+    return FileResponse(path, media_type="application/x-ndjson")
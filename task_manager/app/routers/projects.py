@@ -1,10 +1,23 @@
 # app/routers/projects.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.schemas.projects import ProjectCreate, ProjectUpdate, ProjectResponse
-from app.services.projects_service import create_project, update_project, delete_project, get_all_projects, get_project_by_id
-from app.db import get_db
-from typing import List
+from app.schemas.projects import ProjectCreate, ProjectUpdate, ProjectResponse, ProjectStatsResponse
+from app.schemas.pagination import Page
+from app.services.projects_service import (
+    create_project,
+    update_project,
+    delete_project,
+    get_all_projects,
+    get_project_by_id,
+    get_project_stats,
+    get_project_version,
+    project_etag,
+    get_projects_page_etag,
+)
+from app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.services.etag import etag_matches, not_modified
+from app.services.serialization import FastJSONResponse
+from app.db import get_db, get_read_db
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
@@ -23,12 +36,32 @@ async def update_existing_project(project_id: int, project_data: ProjectUpdate,
 async def delete_existing_project(project_id: int, db: AsyncSession = Depends(get_db)):
     return await delete_project(db=db, project_id=project_id)
 
-#pobieranie wszystkich projektow
-@router.get("/", response_model=List[ProjectResponse])
-async def get_all_projects_list(db: AsyncSession = Depends(get_db)):
-    return await get_all_projects(db=db)
+#pobieranie projektow stronami
+@router.get("/", response_model=Page[ProjectResponse])
+async def get_all_projects_list(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    etag = await get_projects_page_etag(db=db, limit=limit, after=after)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    page = await get_all_projects(db=db, limit=limit, after=after)
+    #gotowe slowniki z bazy - bez ponownej walidacji przez response_model
+    return FastJSONResponse(page, headers={"ETag": etag})
 
 #pobieranie jednego po ID
 @router.get("/{project_id}", response_model=ProjectResponse)
-async def get_project(project_id: int, db: AsyncSession = Depends(get_db)):
-    return await get_project_by_id(db=db, project_id=project_id)
+async def get_project(project_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    version = await get_project_version(db=db, project_id=project_id)
+    etag = project_etag(project_id, version)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return await get_project_by_id(db=db, project_id=project_id, version=version)
+
+#liczba taskow projektu per status
+@router.get("/{project_id}/stats", response_model=ProjectStatsResponse)
+async def get_project_stats_view(project_id: int, db: AsyncSession = Depends(get_read_db)):
+    return await get_project_stats(db=db, project_id=project_id)
@@ -1,29 +1,63 @@
 # app/routers/tasks.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.schemas.task import TaskCreate, TaskUpdate, TaskResponse
+from app.schemas.task import (
+    TaskCreate,
+    TaskUpdate,
+    TaskResponse,
+    TaskBulkCreateResponse,
+    TaskBulkStatusUpdate,
+    TaskBulkStatusResponse,
+)
+from app.schemas.pagination import Page
 from app.services.tasks_service import (
     create_task,
+    create_tasks_bulk,
     update_task,
     delete_task,
     get_all_tasks,
+    export_tasks_ndjson,
+    search_tasks,
     get_task_by_id,
+    get_task_etag,
+    get_tasks_page_etag,
+    parse_task_view,
     assign_task_to_user,
     assign_task_to_project,
-    update_task_status
+    update_task_status,
+    update_tasks_status_bulk
 )
-from app.db import get_db
+from app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.services.etag import etag_matches, not_modified
+from app.services.serialization import FastJSONResponse
+from app.services.events import sse_stream
+from app.db import get_db, get_read_db
 from typing import List
 
 #router na endpointy taskow
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
+#opisy parametrow widoku odpowiedzi (sparse fieldsets)
+FIELDS_DESCRIPTION = "Comma-separated task fields to return, e.g. id,title,status"
+EXPAND_DESCRIPTION = "Comma-separated relations to embed: user, project"
+
 #tworzenie taska
 @router.post("/", response_model=TaskResponse)
 async def create_new_task(task_data: TaskCreate, db: AsyncSession = Depends(get_db)):
     return await create_task(db=db, task_data=task_data)
 
-#edycja taska
+#masowe tworzenie taskow w jednej transakcji
+@router.post("/bulk", response_model=TaskBulkCreateResponse)
+async def create_new_tasks_bulk(tasks_data: List[TaskCreate], db: AsyncSession = Depends(get_db)):
+    return await create_tasks_bulk(db=db, tasks_data=tasks_data)
+
+#masowa zmiana statusu, musi byc przed /{task_id}
+@router.put("/bulk/status", response_model=TaskBulkStatusResponse)
+async def change_tasks_status_bulk(data: TaskBulkStatusUpdate, db: AsyncSession = Depends(get_db)):
+    return await update_tasks_status_bulk(db=db, data=data)
+
+#edycja taska; z polem version zapis tylko gdy task nie zmienil sie od odczytu (inaczej 409)
 @router.put("/{task_id}", response_model=TaskResponse)
 async def update_existing_task(task_id: int, task_data: TaskUpdate, db: AsyncSession = Depends(get_db)):
     return await update_task(db=db, task_id=task_id, task_data=task_data)
@@ -33,15 +67,75 @@ async def update_existing_task(task_id: int, task_data: TaskUpdate, db: AsyncSes
 async def delete_existing_task(task_id: int, db: AsyncSession = Depends(get_db)):
     return await delete_task(db=db, task_id=task_id)
 
-#pobieranie taskow wszystkich
-@router.get("/", response_model=List[TaskResponse])
-async def get_all_tasks_list(db: AsyncSession = Depends(get_db)):
-    return await get_all_tasks(db=db)
+#pobieranie taskow stronami, z filtrami po statusie, userze i projekcie
+#ETag z samych wersji strony - przy zgodnym If-None-Match zwracamy 304 bez budowania listy
+@router.get("/", response_model=Page[TaskResponse])
+async def get_all_tasks_list(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = None,
+    status: str | None = None,
+    user_id: int | None = None,
+    project_id: int | None = None,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str | None = Query(None, description=EXPAND_DESCRIPTION),
+    db: AsyncSession = Depends(get_read_db),
+):
+    view = parse_task_view(fields, expand)
+    filters = dict(limit=limit, after=after, status=status, user_id=user_id, project_id=project_id, view=view)
+    etag = await get_tasks_page_etag(db=db, **filters)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    page = await get_all_tasks(db=db, **filters)
+    #gotowe slowniki z bazy - bez ponownej walidacji przez response_model
+    return FastJSONResponse(page, headers={"ETag": etag})
+
+#eksport wszystkich taskow strumieniowo (NDJSON), musi byc przed /{task_id}
+@router.get("/export")
+async def export_tasks():
+    return StreamingResponse(export_tasks_ndjson(), media_type="application/x-ndjson")
+
+#zmiany taskow na zywo (Server-Sent Events) zamiast odpytywania listy, opcjonalnie tylko
+#dla projektu/usera; zdarzenia: created, updated, assigned, deleted, resync (pobierz liste od nowa)
+#assigned ma tez previous_project_id/previous_user_id - task przeniesiony poza filtr
+#musi byc przed /{task_id}
+@router.get("/events")
+async def task_events_stream(project_id: int | None = None, user_id: int | None = None):
+    return StreamingResponse(
+        sse_stream(project_id=project_id, user_id=user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+#wyszukiwanie pelnotekstowe w tytulach i opisach, musi byc przed /{task_id}
+@router.get("/search", response_model=Page[TaskResponse])
+async def search_tasks_list(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    return await search_tasks(db=db, q=q, limit=limit, after=after)
 
 #pobieranie jednego po ID
 @router.get("/{task_id}", response_model=TaskResponse)
-async def get_task(task_id: int, db: AsyncSession = Depends(get_db)):
-    return await get_task_by_id(db=db, task_id=task_id)
+async def get_task(
+    task_id: int,
+    request: Request,
+    response: Response,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str | None = Query(None, description=EXPAND_DESCRIPTION),
+    db: AsyncSession = Depends(get_read_db),
+):
+    view = parse_task_view(fields, expand)
+    etag = await get_task_etag(db=db, task_id=task_id, view=view)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    task = await get_task_by_id(db=db, task_id=task_id, view=view)
+    if view is not None:
+        return FastJSONResponse(task, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return task
 
 #przypisanie taska do usera
 @router.put("/{task_id}/assign-user/{user_id}", response_model=TaskResponse)
@@ -53,7 +147,7 @@ async def assign_user_to_task(task_id: int, user_id: int, db: AsyncSession = Dep
 async def assign_project_to_task(task_id: int, project_id: int, db: AsyncSession = Depends(get_db)):
     return await assign_task_to_project(db=db, task_id=task_id, project_id=project_id)
 
-#zmiana statusu (string)
-@router.put("/{task_id}/status/")
-async def change_task_status(task_id: int, status: str, db: AsyncSession = Depends(get_db)):
-    return await update_task_status(db=db, task_id=task_id, status=status)
+#zmiana statusu (string); opcjonalnie version jak przy edycji
+@router.put("/{task_id}/status/", response_model=TaskResponse)
+async def change_task_status(task_id: int, status: str, version: int | None = None, db: AsyncSession = Depends(get_db)):
+    return await update_task_status(db=db, task_id=task_id, status=status, version=version)
@@ -1,11 +1,16 @@
 # app/routers/users.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db import get_db
-from app.schemas.user import UserCreate, UserResponse
+from app.db import get_db, get_read_db
+from app.schemas.user import UserCreate, UserResponse, UserImportReport
+from app.schemas.pagination import Page
 from app.services.users_service import (
-    create_user, get_all_users, update_user, delete_user, get_user_by_id
+    create_user, get_all_users, update_user, delete_user, get_user_by_id,
+    get_user_version, user_etag, get_users_page_etag, import_users
 )
+from app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.services.etag import etag_matches, not_modified
+from app.services.serialization import FastJSONResponse
 
 #router dla endpointów userow
 router = APIRouter(prefix="/users", tags=["Users"])
@@ -18,17 +23,38 @@ async def create_new_user(user_data: UserCreate, db: AsyncSession = Depends(get_
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-#endpoint do pobierania listy userow
-@router.get("/", response_model=list[UserResponse])
-async def get_users_list(db: AsyncSession = Depends(get_db)):
-    return await get_all_users(db=db)
+#import userow z pliku CSV (naglowek name,email,password) albo NDJSON, czytany strumieniowo
+@router.post("/import", response_model=UserImportReport)
+async def import_users_file(request: Request, db: AsyncSession = Depends(get_db)):
+    return await import_users(db=db, chunks=request.stream(), content_type=request.headers.get("content-type"))
+
+#endpoint do pobierania listy userow (stronami)
+@router.get("/", response_model=Page[UserResponse])
+async def get_users_list(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    etag = await get_users_page_etag(db=db, limit=limit, after=after)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    page = await get_all_users(db=db, limit=limit, after=after)
+    #gotowe slowniki z bazy - bez ponownej walidacji przez response_model
+    return FastJSONResponse(page, headers={"ETag": etag})
 
 #endpoint do pobierania userow po id
 @router.get("/users/{user_id}")
-async def get_user_by_Id(user_id: int, db: AsyncSession = Depends(get_db)):
-    user = await get_user_by_id(db=db, user_id=user_id)
-    if not user:
+async def get_user_by_Id(user_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    try:
+        version = await get_user_version(db=db, user_id=user_id)
+        etag = user_etag(user_id, version)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        user = await get_user_by_id(db=db, user_id=user_id, version=version)
+    except ValueError:
         raise HTTPException(status_code=404, detail="User not found")
+    response.headers["ETag"] = etag
     return user
 
 #endpoint do aktualizowania userow
@@ -37,7 +63,8 @@ async def update_user_data(user_id: int, user_data: UserCreate, db: AsyncSession
     try:
         return await update_user(db=db, user_id=user_id, user_data=user_data)
     except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+        #brak usera -> 404, zajety email -> 400
+        raise HTTPException(status_code=404 if str(e) == "User not found." else 400, detail=str(e))
 
 #endpoint do usuwania userow
 @router.delete("/{user_id}")
@@ -0,0 +1,20 @@
+# app/schemas/job.py
+from datetime import datetime
+from typing import Any
+from pydantic import BaseModel
+
+#stan zadania w tle
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    status: str
+    progress: int
+    total: int | None = None
+    result: Any = None
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
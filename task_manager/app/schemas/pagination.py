@@ -0,0 +1,10 @@
+# app/schemas/pagination.py
+from typing import Generic, List, TypeVar
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+#strona wynikow z kursorem do nastepnej strony (None = koniec listy)
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: str | None = None
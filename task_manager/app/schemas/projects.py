@@ -13,6 +13,13 @@ class ProjectUpdate(ProjectBase):
 #schemat do zwracania
 class ProjectResponse(ProjectBase):
     id: int
+    version: int
 
     class Config:
         from_attributes = True
+
+#statystyki projektu - liczba taskow per status
+class ProjectStatsResponse(BaseModel):
+    project_id: int
+    total: int
+    by_status: dict[str, int]
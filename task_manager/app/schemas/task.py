@@ -1,4 +1,5 @@
 # app/schemas/task.py
+from typing import List
 from pydantic import BaseModel
 from app.schemas.projects import ProjectResponse
 from app.schemas.user import UserResponse
@@ -11,15 +12,33 @@ class TaskBase(BaseModel):
 
 #schemat do tworzenia projektu
 class TaskCreate(TaskBase):
-    pass
+    user_id: int | None = None  #opcjonalne przypisanie od razu przy tworzeniu
+    project_id: int | None = None
 #schemat do updatow
 class TaskUpdate(TaskBase):
-    pass
+    version: int | None = None  #wersja, ktora klient edytuje - inna w bazie = 409 (brak = bez sprawdzania)
 #schemat do zwracania info
 class TaskResponse(TaskBase):
     id: int
+    version: int
     user: UserResponse | None = None  #pelne dane usera
     project: ProjectResponse | None = None  #pelne dane projektu
 
     class Config:
         from_attributes = True
+
+#odpowiedz na masowe tworzenie - id w kolejnosci z zapytania
+class TaskBulkCreateResponse(BaseModel):
+    ids: List[int]
+
+#masowa zmiana statusu - taski wybrane po liscie id albo filtrem (project_id/user_id/obecny status)
+class TaskBulkStatusUpdate(BaseModel):
+    status: str
+    ids: List[int] | None = None
+    project_id: int | None = None
+    user_id: int | None = None
+    current_status: str | None = None
+
+#odpowiedz na masowa zmiane statusu
+class TaskBulkStatusResponse(BaseModel):
+    updated: int
\ No newline at end of file
@@ -1,4 +1,5 @@
 # app/schemas/user.py
+from typing import List
 from pydantic import BaseModel, EmailStr
 
 #schemat podstawowy
@@ -13,7 +14,23 @@ class UserCreate(UserBase):
 #schemat do wyswietlania id przy zwracanych zapytaniach fastapi
 class UserResponse(UserBase):
     id: int
+    version: int
 
     #konwersja obiektow na schemat Pydantic
     class Config:
         from_attributes = True
+
+#wynik importu jednego wiersza: created / duplicate / invalid
+class UserImportRow(BaseModel):
+    row: int
+    status: str
+    email: str | None = None
+    id: int | None = None
+    error: str | None = None
+
+#raport z importu userow
+class UserImportReport(BaseModel):
+    created: int
+    duplicates: int
+    invalid: int
+    rows: List[UserImportRow]
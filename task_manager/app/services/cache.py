@@ -0,0 +1,69 @@
+# app/services/cache.py
+import time
+from collections import OrderedDict
+from app.config import PROJECT_CACHE_SIZE, PROJECT_CACHE_TTL, USER_CACHE_SIZE, USER_CACHE_TTL
+
+
+#cache LRU + TTL w pamieci procesu
+#operacje nie maja await w srodku, wiec w jednej petli asyncio sa atomowe
+#kazdy worker ma wlasny cache - miedzy procesami nieaktualnosc ogranicza TTL
+#(GET po id porownuje wersje wpisu z wersja w bazie, wiec tam cache nie jest nieaktualny)
+class LRUCache:
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  #klucz -> (czas wygasniecia, wartosc)
+        self._generation = 0
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    #token pobierany przed odczytem z bazy; jesli w miedzyczasie byl zapis
+    #(invalidate), to set() z tym tokenem nie wpisze juz starej wartosci
+    def token(self) -> int:
+        return self._generation
+
+    def set(self, key, value, token: int | None = None):
+        if self.maxsize <= 0 or (token is not None and token != self._generation):
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        self._generation += 1
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._generation += 1
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+project_cache = LRUCache("projects", PROJECT_CACHE_SIZE, PROJECT_CACHE_TTL)
+user_cache = LRUCache("users", USER_CACHE_SIZE, USER_CACHE_TTL)
+
+
+#liczniki wszystkich cache (do doboru rozmiaru)
+def cache_stats() -> dict:
+    return {cache.name: cache.stats() for cache in (project_cache, user_cache)}
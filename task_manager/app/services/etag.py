@@ -0,0 +1,34 @@
+# app/services/etag.py
+import hashlib
+from fastapi import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.services.pagination import decode_cursor
+
+
+#silny ETag liczony z rodzaju zasobu i (id, wersja) zasobu oraz zasobow zagniezdzonych w odpowiedzi
+def make_etag(kind: str, parts) -> str:
+    digest = hashlib.blake2b(repr((kind, parts)).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+#porownanie z naglowkiem If-None-Match (lista tagow albo "*")
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+#ETag strony listy - to samo zapytanie keyset co paginate(), ale tylko kolumny id/version
+async def page_etag(db: AsyncSession, kind: str, query, id_column, limit: int, after: str | None = None) -> str:
+    if after is not None:
+        query = query.filter(id_column > decode_cursor(after))
+    result = await db.execute(query.order_by(id_column).limit(limit + 1))
+    return make_etag(kind, [tuple(row) for row in result.all()])
@@ -0,0 +1,86 @@
+# app/services/events.py
+import asyncio
+import itertools
+from app.config import EVENT_BUFFER_SIZE, EVENT_KEEPALIVE
+from app.services.serialization import dumps
+
+#zdarzenia zmian taskow rozsylane w procesie do subskrybentow SSE (GET /tasks/events)
+#zamiast odpytywania GET /tasks/ przez kazda otwarta karte
+
+
+class Subscription:
+    def __init__(self, project_id: int | None, user_id: int | None, maxsize: int):
+        self.project_id = project_id
+        self.user_id = user_id
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    #przypisanie niesie tez poprzedni projekt/usera (previous_*) - subskrybent starego
+    #dostaje zdarzenie o przeniesieniu taska poza swoj filtr
+    def matches(self, task: dict) -> bool:
+        return self._field_matches(task, "project_id", self.project_id) and self._field_matches(
+            task, "user_id", self.user_id
+        )
+
+    @staticmethod
+    def _field_matches(task: dict, field: str, wanted: int | None) -> bool:
+        return wanted is None or wanted in (task.get(field), task.get(f"previous_{field}"))
+
+
+class TaskEventBroadcaster:
+    def __init__(self, buffer_size: int):
+        self.buffer_size = buffer_size
+        self._subscribers = set()
+        self._ids = itertools.count(1)
+        self.published = 0
+        self.overflows = 0
+
+    def subscribe(self, project_id: int | None = None, user_id: int | None = None) -> Subscription:
+        subscription = Subscription(project_id, user_id, self.buffer_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    #bez czekania na subskrybentow; pelny bufor (wolny klient) jest czyszczony i dostaje
+    #jedno zdarzenie "resync" - klient pobiera liste od nowa, a pamiec nie rosnie
+    def publish(self, event_type: str, task: dict):
+        event = (next(self._ids), event_type, task)
+        self.published += 1
+        for subscription in self._subscribers:
+            if not subscription.matches(task):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.overflows += 1
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait((event[0], "resync", {}))
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "overflows": self.overflows,
+        }
+
+
+task_events = TaskEventBroadcaster(EVENT_BUFFER_SIZE)
+
+
+#strumien SSE jednego klienta; subskrypcja zyje tyle co generator (rozlaczenie klienta
+#przerywa generator i usuwa subskrypcje), a przy ciszy idzie komentarz keep-alive
+async def sse_stream(project_id: int | None = None, user_id: int | None = None, keepalive: float = EVENT_KEEPALIVE):
+    subscription = task_events.subscribe(project_id=project_id, user_id=user_id)
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            try:
+                event_id, event_type, task = await asyncio.wait_for(subscription.queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            yield f"id: {event_id}\nevent: {event_type}\ndata: ".encode() + dumps(task) + b"\n\n"
+    finally:
+        task_events.unsubscribe(subscription)
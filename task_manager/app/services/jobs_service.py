@@ -0,0 +1,276 @@
+# app/services/jobs_service.py
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from sqlalchemy import func, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.config import (
+    JOB_WORKERS, JOB_FILES_DIR, JOB_PROGRESS_INTERVAL, JOB_BULK_STATUS_CHUNK,
+    JOB_HEARTBEAT_INTERVAL, JOB_HEARTBEAT_TIMEOUT,
+)
+from app.db import AsyncSessionLocal
+from app.models.job import Job
+from app.models.task import Task
+from app.schemas.task import TaskBulkStatusUpdate
+from app.services.serialization import dumps
+from app.services.tasks_service import EXPORT_CHUNK_SIZE, get_all_tasks, update_tasks_status_in_chunks
+from app.services.users_service import import_users
+
+#zadania w tle bez zewnetrznego brokera: kolejka asyncio w procesie + stan w tabeli jobs
+#workery startuja w lifespan; zadanie running ma wlasciciela (worker_id) odswiezajacego heartbeat,
+#do kolejki wraca tylko zadanie bez heartbeatu od JOB_HEARTBEAT_TIMEOUT (kilka procesow na jednej bazie
+#nie wykona tego samego zadania dwa razy), a zadania zatrzymywanego procesu - od razu przy stop
+
+logger = logging.getLogger(__name__)
+
+#identyfikator tego procesu jako wlasciciela zadan
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+#obsluga zadania: rodzaj -> async fn(db, params, progress) zwracajaca wynik (JSON)
+#progress(zrobione, wszystkie=None) wolac poza otwarta transakcja - zapisuje osobna sesja
+JOB_HANDLERS = {}
+
+
+def job_handler(kind: str):
+    def register(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+#zapis postepu do bazy najwyzej co JOB_PROGRESS_INTERVAL sekund
+class _ProgressReporter:
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.progress = 0
+        self.total = None
+        self._written_at = 0.0
+
+    async def __call__(self, progress: int, total: int | None = None):
+        self.progress = progress
+        if total is not None:
+            self.total = total
+        if time.monotonic() - self._written_at < JOB_PROGRESS_INTERVAL:
+            return
+        self._written_at = time.monotonic()
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Job).where(Job.id == self.job_id).values(progress=self.progress, total=self.total)
+            )
+            await db.commit()
+
+
+#zadania running spelniajace warunek wracaja do kolejki; zwraca ich id
+async def _requeue_running(db: AsyncSession, *conditions) -> list:
+    result = await db.execute(
+        update(Job)
+        .where(Job.status == "running", *conditions)
+        .values(status="queued", progress=0, started_at=None, worker_id=None, heartbeat_at=None)
+        .returning(Job.id)
+    )
+    return result.scalars().all()
+
+
+#zadania procesow bez heartbeatu od JOB_HEARTBEAT_TIMEOUT (null = zadanie sprzed heartbeatow)
+async def _requeue_stale(db: AsyncSession) -> list:
+    stale_before = _now() - timedelta(seconds=JOB_HEARTBEAT_TIMEOUT)
+    return await _requeue_running(db, (Job.heartbeat_at < stale_before) | Job.heartbeat_at.is_(None))
+
+
+class JobQueue:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._queue = None
+        self._tasks = []
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        async with AsyncSessionLocal() as db:
+            await _requeue_stale(db)
+            result = await db.execute(select(Job.id).where(Job.status == "queued").order_by(Job.id))
+            pending = result.scalars().all()
+            await db.commit()
+        for job_id in pending:
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        #przerwane zadania tego procesu od razu do kolejki (bez czekania na JOB_HEARTBEAT_TIMEOUT)
+        async with AsyncSessionLocal() as db:
+            await _requeue_running(db, Job.worker_id == WORKER_ID)
+            await db.commit()
+
+    def submit(self, job_id: int):
+        self._queue.put_nowait(job_id)
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await _run_job(job_id)
+            except Exception:
+                logger.exception("Job %d crashed", job_id)
+            finally:
+                self._queue.task_done()
+
+    #heartbeat wlasnych zadan + przejecie zadan po procesach, ktore przestaly go odswiezac
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(Job)
+                        .where(Job.status == "running", Job.worker_id == WORKER_ID)
+                        .values(heartbeat_at=_now())
+                    )
+                    stale = await _requeue_stale(db)
+                    await db.commit()
+            except Exception:
+                logger.exception("Job heartbeat failed")
+                continue
+            for job_id in stale:
+                logger.warning("Job %d requeued after its worker stopped sending heartbeats", job_id)
+                self._queue.put_nowait(job_id)
+
+
+job_queue = JobQueue(JOB_WORKERS)
+
+
+async def _run_job(job_id: int):
+    async with AsyncSessionLocal() as db:
+        #przejecie zadania warunkowym UPDATE - to samo id nie wykona sie dwa razy
+        claimed = (await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "queued")
+            .values(status="running", started_at=_now(), worker_id=WORKER_ID, heartbeat_at=_now())
+            .returning(Job.kind, Job.params)
+        )).first()
+        await db.commit()
+        if claimed is None:
+            return
+
+        kind, params = claimed
+        progress = _ProgressReporter(job_id)
+        try:
+            result = await JOB_HANDLERS[kind](db, params or {}, progress)
+            values = {"status": "done", "result": result}
+        except Exception as e:
+            await db.rollback()
+            logger.exception("Job %d (%s) failed", job_id, kind)
+            values = {"status": "failed", "error": str(e) or type(e).__name__}
+        #wynik zapisuje tylko aktualny wlasciciel - zadanie przejete po utracie heartbeatu konczy kto inny
+        finished = await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.worker_id == WORKER_ID)
+            .values(progress=progress.progress, total=progress.total, finished_at=_now(), **values)
+        )
+        await db.commit()
+        if not finished.rowcount:
+            logger.warning("Job %d was taken over by another worker, result discarded", job_id)
+
+
+#nowe zadanie: wiersz w jobs + id do kolejki
+async def enqueue_job(db: AsyncSession, kind: str, params: dict):
+    result = await db.execute(insert(Job).values(kind=kind, params=params).returning(Job))
+    job = result.scalars().first()
+    await db.commit()
+    job_queue.submit(job.id)
+    return job
+
+
+async def get_job_by_id(db: AsyncSession, job_id: int):
+    job = (await db.execute(select(Job).filter(Job.id == job_id))).scalars().first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+#plik wynikowy zakonczonego zadania (eksport)
+async def get_job_result_file(db: AsyncSession, job_id: int) -> str:
+    job = await get_job_by_id(db, job_id)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if not job.result or "file" not in job.result:
+        raise HTTPException(status_code=404, detail="Job has no result file")
+    return os.path.join(JOB_FILES_DIR, job.result["file"])
+
+
+async def _write_file(file, data: bytes):
+    await asyncio.to_thread(file.write, data)
+
+
+#zapis uploadu na dysk przed zakolejkowaniem - request konczy sie zaraz po przeslaniu pliku
+async def spool_upload(chunks, prefix: str) -> str:
+    os.makedirs(JOB_FILES_DIR, exist_ok=True)
+    name = f"{prefix}_{uuid.uuid4().hex}.upload"
+    with open(os.path.join(JOB_FILES_DIR, name), "wb") as file:
+        async for chunk in chunks:
+            await _write_file(file, chunk)
+    return name
+
+
+async def _read_file_chunks(path: str, chunk_size: int = 64 * 1024):
+    with open(path, "rb") as file:
+        while chunk := await asyncio.to_thread(file.read, chunk_size):
+            yield chunk
+
+
+#eksport do pliku NDJSON stronami keyset - kazda strona w osobnej krotkiej transakcji odczytu,
+#zeby eksport nie blokowal zapisow (i zapisu postepu) na czas calego przebiegu
+@job_handler("tasks_export")
+async def _export_tasks_job(db: AsyncSession, params: dict, progress):
+    os.makedirs(JOB_FILES_DIR, exist_ok=True)
+    name = f"tasks_export_{uuid.uuid4().hex}.ndjson"
+    total = (await db.execute(select(func.count(Task.id)))).scalar()
+    await db.commit()
+
+    rows, after = 0, None
+    with open(os.path.join(JOB_FILES_DIR, name), "wb") as file:
+        while True:
+            page = await get_all_tasks(db, limit=EXPORT_CHUNK_SIZE, after=after)
+            await db.commit()
+            await _write_file(file, b"".join(dumps(item) + b"\n" for item in page["items"]))
+            rows += len(page["items"])
+            await progress(rows, total)
+            after = page["next_cursor"]
+            if after is None:
+                break
+    return {"rows": rows, "file": name}
+
+
+@job_handler("users_import")
+async def _import_users_job(db: AsyncSession, params: dict, progress):
+    path = os.path.join(JOB_FILES_DIR, params["file"])
+    try:
+        report = await import_users(db, _read_file_chunks(path), params.get("content_type"), progress=progress)
+    except Exception:
+        os.remove(path)
+        raise
+    os.remove(path)
+    await progress(len(report["rows"]))
+    return report
+
+
+@job_handler("tasks_bulk_status")
+async def _bulk_status_job(db: AsyncSession, params: dict, progress):
+    data = TaskBulkStatusUpdate(**params)
+    return await update_tasks_status_in_chunks(db, data, JOB_BULK_STATUS_CHUNK, progress)
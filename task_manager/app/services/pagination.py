@@ -0,0 +1,61 @@
+# app/services/pagination.py
+import base64
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import engine
+
+#domyslny i maksymalny rozmiar strony
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+#id z kursora musi zmiescic sie w kolumnie Integer (32 bity w Postgresie, 64 w SQLite),
+#inaczej sterownik odrzuca parametr zapytania (OverflowError / DataError -> 500)
+_MAX_ID = 2**31 - 1 if engine.dialect.name == "postgresql" else 2**63 - 1
+
+
+#kursor to zakodowane id ostatniego elementu strony (nieprzezroczysty dla klienta)
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def _check_id(last_id: int) -> int:
+    if not 0 <= last_id <= _MAX_ID:
+        raise ValueError("cursor id out of range")
+    return last_id
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return _check_id(int(base64.urlsafe_b64decode(padded.encode()).decode()))
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+#kursor wynikow sortowanych po trafnosci: (rank, id) ostatniego elementu
+def encode_rank_cursor(rank: float, last_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{rank!r}:{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, last_id = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        return float(rank), _check_id(int(last_id))
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+#paginacja po kluczu (keyset): WHERE id > :after ORDER BY id LIMIT :limit + 1
+#dodatkowy wiersz mowi tylko czy istnieje kolejna strona, wiec nie ma osobnego COUNT
+#scalars=False zwraca wiersze (zapytania o wybrane kolumny), wtedy kolumna id musi byc w wierszu
+async def paginate(db: AsyncSession, query, id_column, limit: int, after: str | None = None, scalars: bool = True):
+    if after is not None:
+        query = query.filter(id_column > decode_cursor(after))
+    result = await db.execute(query.order_by(id_column).limit(limit + 1))
+    rows = result.scalars().all() if scalars else result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+    return {"items": rows, "next_cursor": next_cursor}
@@ -1,56 +1,121 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import insert, update, delete
 from app.models.projects import Project
-from app.schemas.projects import ProjectCreate, ProjectUpdate
+from app.models.project_stats import ProjectTaskCount
+from app.models.task import Task
+from app.schemas.projects import ProjectCreate, ProjectUpdate, ProjectResponse
 from fastapi import HTTPException
+from app.services.pagination import DEFAULT_PAGE_SIZE, paginate
+from app.services.cache import project_cache
+from app.services.etag import make_etag, page_etag
+from app.services.serialization import rows_to_dicts
+from app.services.tasks_service import detach_tasks, publish_detached_tasks
 
 
 #tworzenie projektu
 async def create_project(db: AsyncSession, project_data: ProjectCreate):
-    new_project = Project(name=project_data.name, description=project_data.description)
-    db.add(new_project)
+    #INSERT ... RETURNING od razu zwraca wiersz z nadanym id
+    result = await db.execute(
+        insert(Project)
+        .values(name=project_data.name, description=project_data.description)
+        .returning(Project)
+    )
+    new_project = result.scalars().first()
     await db.commit()
-    await db.refresh(new_project)  # Upewnia się, że `id` projektu zostanie uzupełnione
     return new_project
 
 
 #edytowanie
 async def update_project(db: AsyncSession, project_id: int, project_data: ProjectUpdate):
-    result = await db.execute(select(Project).filter(Project.id == project_id))
+    result = await db.execute(
+        update(Project)
+        .where(Project.id == project_id)
+        .values(
+            name=project_data.name,
+            description=project_data.description,
+            version=Project.version + 1,
+        )
+        .returning(Project)
+        .execution_options(populate_existing=True)
+    )
     project = result.scalars().first()
+    await db.commit()
+    project_cache.invalidate(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-
-    project.name = project_data.name
-    project.description = project_data.description
-    await db.commit()
-    await db.refresh(project)
     return project
 
 
 #usuwanie
 async def delete_project(db: AsyncSession, project_id: int):
-    result = await db.execute(select(Project).filter(Project.id == project_id))
-    project = result.scalars().first()
-    if not project:
+    #taski odpinane przed usunieciem (zdarzenia i wersje), liczniki usuwa ON DELETE CASCADE
+    detached = await detach_tasks(db, Task.project_id, project_id)
+    result = await db.execute(delete(Project).where(Project.id == project_id).returning(Project.id))
+    if result.scalar() is None:
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Project not found")
 
-    await db.delete(project)
     await db.commit()
+    project_cache.invalidate(project_id)
+    publish_detached_tasks(detached)
     return {"detail": "Project deleted successfully"}
 
 
-#pobieranie wszystkich
-async def get_all_projects(db: AsyncSession):
-    result = await db.execute(select(Project))
-    projects = result.scalars().all()
-    return projects
+#pobieranie projektow stronami (kursor po id)
+#slowniki z kolumnami ProjectResponse (bez obiektow ORM)
+async def get_all_projects(db: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: str | None = None):
+    query = select(Project.id, Project.name, Project.description, Project.version)
+    page = await paginate(db, query, Project.id, limit=limit, after=after, scalars=False)
+    page["items"] = rows_to_dicts(page["items"])
+    return page
 
 
-#pobieranie jednego po ID
-async def get_project_by_id(db: AsyncSession, project_id: int):
+#pobieranie jednego po ID (najpierw z cache)
+#version: aktualna wersja z bazy - wpis cache z inna wersja (zapis w innym procesie) jest pomijany
+async def get_project_by_id(db: AsyncSession, project_id: int, version: int | None = None):
+    cached = project_cache.get(project_id)
+    if cached is not None and (version is None or cached.version == version):
+        return cached
+
+    token = project_cache.token()
     result = await db.execute(select(Project).filter(Project.id == project_id))
     project = result.scalars().first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+    #w cache trzymamy schemat, a nie obiekt ORM powiazany z sesja
+    project = ProjectResponse.model_validate(project)
+    project_cache.set(project_id, project, token)
     return project
+
+
+#wersja projektu jednym SELECT po kluczu - zrodlo ETagu wspolne dla wszystkich procesow
+#(cache jest per proces, wiec ETag z cache mogl byc nieaktualny po zapisie w innym workerze)
+async def get_project_version(db: AsyncSession, project_id: int) -> int:
+    version = (await db.execute(select(Project.version).where(Project.id == project_id))).scalar()
+    if version is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return version
+
+
+#ETag jednego projektu z jego wersji
+def project_etag(project_id: int, version: int) -> str:
+    return make_etag("project", (project_id, version))
+
+
+#ETag strony listy projektow
+async def get_projects_page_etag(db: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: str | None = None):
+    query = select(Project.id, Project.version)
+    return await page_etag(db, "projects", query, Project.id, limit=limit, after=after)
+
+
+#statystyki projektu z tabeli licznikow (bez skanowania taskow projektu)
+async def get_project_stats(db: AsyncSession, project_id: int):
+    await get_project_by_id(db, project_id)
+    result = await db.execute(
+        select(ProjectTaskCount.status, ProjectTaskCount.count).filter(
+            ProjectTaskCount.project_id == project_id, ProjectTaskCount.count > 0
+        )
+    )
+    by_status = dict(result.all())
+    return {"project_id": project_id, "total": sum(by_status.values()), "by_status": by_status}
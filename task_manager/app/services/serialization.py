@@ -0,0 +1,28 @@
+# app/services/serialization.py
+from fastapi.responses import JSONResponse
+
+#szybka sciezka odpowiedzi list: wiersze z bazy jako slowniki, bez budowania modeli pydantic,
+#kodowane orjson (gdy brak pakietu - standardowy json jak w JSONResponse)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content)
+
+
+#kodowanie jednego obiektu (np. linii NDJSON)
+def dumps(content) -> bytes:
+    if orjson is None:
+        return JSONResponse(content).body
+    return orjson.dumps(content)
+
+
+#wiersze z select(kolumny...) jako slowniki {nazwa kolumny: wartosc}
+def rows_to_dicts(rows) -> list:
+    return [row._asdict() for row in rows]
@@ -1,65 +1,317 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import insert, update, delete, exists, literal_column, or_, and_, bindparam, func
+from typing import List
 from app.models.task import Task
 from app.models.user import User
 from app.models.projects import Project
-from app.schemas.task import TaskCreate, TaskUpdate
+from app.models.task_search import tasks_fts, tasks_tsvector
+from app.schemas.task import TaskCreate, TaskUpdate, TaskBulkStatusUpdate
+from app.db import ReadSessionLocal, engine
 from fastapi import HTTPException
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
+from app.services.pagination import DEFAULT_PAGE_SIZE, paginate, encode_rank_cursor, decode_rank_cursor
+from app.services.cache import project_cache, user_cache
+from app.services.etag import make_etag, page_etag
+from app.services.serialization import dumps
+from app.services.events import task_events
+from app.services.write_batcher import run_write
+
+#zapis jednym poleceniem INSERT/UPDATE ... RETURNING zamiast SELECT + commit + refresh
+#relacje do odpowiedzi laduje selectinload (dodatkowy SELECT tylko gdy FK nie jest NULL)
+#pusty wynik = brak wiersza spelniajacego WHERE
+#bez commitu - zatwierdza run_write (od razu albo grupowo przez write batcher)
+async def _write_task(db: AsyncSession, stmt):
+    result = await db.execute(
+        stmt.returning(Task)
+        .options(selectinload(Task.user), selectinload(Task.project))
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+
+#zdarzenia zmian dla subskrybentow SSE - publikowane po commicie, z plaskimi kolumnami taska
+_TASK_COLUMNS = tuple(Task.__table__.columns)
+
+
+def _task_dict(task) -> dict:
+    return {column.key: getattr(task, column.key) for column in _TASK_COLUMNS}
+
+
+def _publish_tasks(event_type: str, tasks):
+    for task in tasks:
+        if not isinstance(task, dict):
+            task = _task_dict(task)
+        task_events.publish(event_type, task)
+
+
+#sprawdzenie czy wskazani userzy i projekty istnieja (jedno zapytanie na tabele)
+#id obecne w cache nie ida do bazy
+async def _check_task_refs(db: AsyncSession, user_ids: set, project_ids: set):
+    checks = ((User, user_ids, user_cache, "User"), (Project, project_ids, project_cache, "Project"))
+    for model, ids, cache, name in checks:
+        ids = {i for i in ids if i is not None and cache.get(i) is None}
+        if not ids:
+            continue
+        result = await db.execute(select(model.id).filter(model.id.in_(ids)))
+        missing = ids - set(result.scalars().all())
+        if missing:
+            raise HTTPException(status_code=404, detail=f"{name} not found: {sorted(missing)}")
+
 
 #tworzenie zadania
 async def create_task(db: AsyncSession, task_data: TaskCreate):
-    new_task = Task(
+    await _check_task_refs(db, {task_data.user_id}, {task_data.project_id})
+    stmt = insert(Task).values(
         title=task_data.title,
         description=task_data.description,
         status=task_data.status,
+        user_id=task_data.user_id,
+        project_id=task_data.project_id,
     )
-    db.add(new_task)
+    task = await run_write(db, lambda db: _write_task(db, stmt))
+    _publish_tasks("created", [task])
+    return task
+
+
+#masowe tworzenie zadan - jeden INSERT (executemany) w jednej transakcji
+async def create_tasks_bulk(db: AsyncSession, tasks_data: List[TaskCreate]):
+    if not tasks_data:
+        return {"ids": []}
+    await _check_task_refs(
+        db, {t.user_id for t in tasks_data}, {t.project_id for t in tasks_data}
+    )
+    rows = [
+        {
+            "title": t.title,
+            "description": t.description,
+            "status": t.status,
+            "user_id": t.user_id,
+            "project_id": t.project_id,
+        }
+        for t in tasks_data
+    ]
+    #SQLite nadaje rowid rosnaco w kolejnosci VALUES, a w jednej transakcji nikt inny nie pisze,
+    #wiec posortowane id odpowiadaja kolejnosci wierszy (sort_by_parameter_order na SQLite
+    #wykonuje INSERT wiersz po wierszu, bo dialekt nie ma sentinela); w Postgresie sekwencja
+    #tez przydziela id rosnaco w kolejnosci VALUES - rownolegle inserty daja najwyzej dziury
+    #insert na tabeli (Core), a nie na modelu - ORM dzieli executemany na grupy po tym
+    #ktore kolumny sa None, co przy mieszanych user_id/project_id daje INSERT per wiersz
+    tasks_table = Task.__table__
+    result = await db.execute(insert(tasks_table).returning(tasks_table.c.id), rows)
+    ids = sorted(result.scalars().all())
     await db.commit()
-    await db.refresh(new_task)
-    return new_task
+    _publish_tasks("created", ({"id": task_id, **row, "version": 1} for task_id, row in zip(ids, rows)))
+    return {"ids": ids}
 
 
 #edytowanie
 async def update_task(db: AsyncSession, task_id: int, task_data: TaskUpdate):
-    result = await db.execute(select(Task).filter(Task.id == task_id))
-    task = result.scalars().first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
-    task.title = task_data.title
-    task.description = task_data.description
-    task.status = task_data.status
-    task.user_id = task_data.user_id
-    task.project_id = task_data.project_id
-    await db.commit()
-    await db.refresh(task)
+    stmt = (
+        update(Task)
+        .where(*_task_version_conditions(task_id, task_data.version))
+        .values(
+            title=task_data.title,
+            description=task_data.description,
+            status=task_data.status,
+            version=Task.version + 1,
+        )
+    )
+    task = await run_write(db, lambda db: _write_existing_task(db, stmt, task_id, task_data.version))
+    _publish_tasks("updated", [task])
     return task
 
 
+#optymistyczna blokada: z podana wersja UPDATE zmienia wiersz tylko, gdy nikt go w miedzyczasie
+#nie zapisal - sprawdzenie i zapis w jednym poleceniu, bez odczytu i blokowania wiersza
+def _task_version_conditions(task_id: int, version: int | None) -> list:
+    conditions = [Task.id == task_id]
+    if version is not None:
+        conditions.append(Task.version == version)
+    return conditions
+
+
+#UPDATE jednego taska; brak wiersza = 404, nieaktualna wersja = 409
+#(bledy bez zapisu, wiec nie psuja paczki batchera)
+async def _write_existing_task(db: AsyncSession, stmt, task_id: int, version: int | None = None):
+    task = await _write_task(db, stmt)
+    if task:
+        return task
+    #dopiero przy bledzie sprawdzamy, czy task istnieje
+    current = None
+    if version is not None:
+        current = (await db.execute(select(Task.version).where(Task.id == task_id))).scalar()
+    if current is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    raise HTTPException(status_code=409, detail=f"Task was modified (version {version} expected, current {current})")
+
+
 #usuwanie
 async def delete_task(db: AsyncSession, task_id: int):
-    result = await db.execute(select(Task).filter(Task.id == task_id))
-    task = result.scalars().first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
+    async def delete_row(db: AsyncSession):
+        result = await db.execute(delete(Task).where(Task.id == task_id).returning(*_TASK_COLUMNS))
+        deleted = result.first()
+        if deleted is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return deleted._asdict()
 
-    await db.delete(task)
-    await db.commit()
+    _publish_tasks("deleted", [await run_write(db, delete_row)])
     return {"detail": "Task deleted successfully"}
 
 
-#pobieranie wszystkich zadan
-async def get_all_tasks(db: AsyncSession):
-    result = await db.execute(
-        select(Task).options(joinedload(Task.user), joinedload(Task.project))
-    )
-    tasks = result.scalars().all()
-    return tasks
+#pobieranie zadan stronami (kursor po id), opcjonalnie filtrowane
+async def get_all_tasks(
+    db: AsyncSession,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: str | None = None,
+    status: str | None = None,
+    user_id: int | None = None,
+    project_id: int | None = None,
+    view: tuple | None = None,
+):
+    #lista zawsze jako slowniki z wybranych kolumn (bez obiektow ORM i walidacji pydantic),
+    #bez fields/expand w ksztalcie TaskResponse
+    view = view or TASK_RESPONSE_VIEW
+    query = _task_view_query(view).filter(*_task_filters(status, user_id, project_id))
+    page = await paginate(db, query, Task.id, limit=limit, after=after, scalars=False)
+    page["items"] = [_task_view_row(row, view) for row in page["items"]]
+    return page
+
+
+#pola taska dostepne w fields= i relacje dostepne w expand= (kolumny zagniezdzonego obiektu)
+TASK_FIELDS = {
+    "id": Task.id,
+    "title": Task.title,
+    "description": Task.description,
+    "status": Task.status,
+    "version": Task.version,
+    "user_id": Task.user_id,
+    "project_id": Task.project_id,
+}
+TASK_EXPANSIONS = {
+    "user": (User, Task.user_id, ("id", "name", "email", "version")),
+    "project": (Project, Task.project_id, ("id", "name", "description", "version")),
+}
+#widok odpowiadajacy TaskResponse
+TASK_RESPONSE_VIEW = (("id", "title", "description", "status", "version"), ("user", "project"))
+
+
+def _split_names(value: str, allowed, kind: str) -> tuple:
+    names = tuple(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown {kind}: {', '.join(unknown)}")
+    return names
+
+
+#widok odpowiedzi z parametrow fields= / expand= jako (pola, relacje)
+#None = pelna odpowiedz TaskResponse (zachowanie bez parametrow)
+def parse_task_view(fields: str | None, expand: str | None) -> tuple | None:
+    if fields is None and expand is None:
+        return None
+    selected = _split_names(fields, TASK_FIELDS, "fields") if fields else tuple(TASK_FIELDS)
+    expansions = _split_names(expand, TASK_EXPANSIONS, "expand") if expand else ()
+    return selected, expansions
+
+
+#tylko wybrane kolumny; JOIN tylko dla relacji z expand=
+#id taska zawsze w wierszu (kursor), kolumny relacji jako "<relacja>__<kolumna>"
+def _task_view_query(view: tuple):
+    selected, expansions = view
+    columns = [Task.id] + [TASK_FIELDS[name] for name in selected if name != "id"]
+    query = select(*columns)
+    for name in expansions:
+        model, foreign_key, model_columns = TASK_EXPANSIONS[name]
+        query = query.add_columns(
+            *(getattr(model, column).label(f"{name}__{column}") for column in model_columns)
+        ).outerjoin(model, foreign_key == model.id)
+    return query
+
+
+def _task_view_row(row, view: tuple) -> dict:
+    selected, expansions = view
+    mapping = row._mapping
+    item = {name: mapping[name] for name in selected}
+    for name in expansions:
+        columns = TASK_EXPANSIONS[name][2]
+        nested = {column: mapping[f"{name}__{column}"] for column in columns}
+        item[name] = nested if nested["id"] is not None else None
+    return item
+
+
+#warunki filtrowania listy taskow
+def _task_filters(status: str | None, user_id: int | None, project_id: int | None):
+    conditions = []
+    if status is not None:
+        conditions.append(Task.status == status)
+    if user_id is not None:
+        conditions.append(Task.user_id == user_id)
+    if project_id is not None:
+        conditions.append(Task.project_id == project_id)
+    return conditions
+
+
+#same wersje taska i zagniezdzonych usera/projektu - tanie sprawdzenie pod ETag,
+#bez budowania obiektow i serializacji odpowiedzi
+#przy widoku fields/expand JOIN tylko dla rozwinietych relacji, a widok wchodzi do ETagu
+def _task_versions_query(view: tuple | None = None):
+    expansions = view[1] if view is not None else tuple(TASK_EXPANSIONS)
+    query = select(Task.id, Task.version)
+    for name in expansions:
+        model, foreign_key, _ = TASK_EXPANSIONS[name]
+        query = query.add_columns(model.id, model.version).outerjoin(model, foreign_key == model.id)
+    return query
+
+
+def _etag_kind(kind: str, view: tuple | None) -> str:
+    return kind if view is None else f"{kind}:{view!r}"
 
 
-#pobieranie po ID
-async def get_task_by_id(db: AsyncSession, task_id: int):
+#ETag jednego taska
+async def get_task_etag(db: AsyncSession, task_id: int, view: tuple | None = None):
+    result = await db.execute(_task_versions_query(view).filter(Task.id == task_id))
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return make_etag(_etag_kind("task", view), tuple(row))
+
+
+#ETag strony listy taskow (te same filtry i kursor co get_all_tasks)
+async def get_tasks_page_etag(
+    db: AsyncSession,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: str | None = None,
+    status: str | None = None,
+    user_id: int | None = None,
+    project_id: int | None = None,
+    view: tuple | None = None,
+):
+    query = _task_versions_query(view).filter(*_task_filters(status, user_id, project_id))
+    return await page_etag(db, _etag_kind("tasks", view), query, Task.id, limit=limit, after=after)
+
+
+#eksport wszystkich zadan jako NDJSON, czytany i wysylany paczkami
+#wlasna sesja tylko do odczytu, bo generator zyje dluzej niz zaleznosc get_read_db
+#yield_per nie trzyma wierszy w pamieci, wiec pamiec nie rosnie z kazda paczka
+EXPORT_CHUNK_SIZE = 1000
+
+
+async def export_tasks_ndjson(chunk_size: int = EXPORT_CHUNK_SIZE):
+    async with ReadSessionLocal() as db:
+        result = await db.stream(
+            _task_view_query(TASK_RESPONSE_VIEW).order_by(Task.id).execution_options(yield_per=chunk_size)
+        )
+        async for rows in result.partitions():
+            yield b"".join(dumps(_task_view_row(row, TASK_RESPONSE_VIEW)) + b"\n" for row in rows)
+
+
+#pobieranie po ID (view jak w get_all_tasks)
+async def get_task_by_id(db: AsyncSession, task_id: int, view: tuple | None = None):
+    if view is not None:
+        row = (await db.execute(_task_view_query(view).filter(Task.id == task_id))).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return _task_view_row(row, view)
     result = await db.execute(
         select(Task).options(joinedload(Task.user), joinedload(Task.project)).filter(Task.id == task_id)
     )
@@ -71,41 +323,177 @@ async def get_task_by_id(db: AsyncSession, task_id: int):
 
 #przypisanie zadania do jakiegos usera
 async def assign_task_to_user(db: AsyncSession, task_id: int, user_id: int):
-    task = await get_task_by_id(db, task_id)
-    result = await db.execute(select(User).filter(User.id == user_id))
-    user = result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    task.user_id = user_id
-    await db.commit()
-    await db.refresh(task)
+    #istnienie usera sprawdzane w tym samym UPDATE
+    stmt = (
+        update(Task)
+        .where(Task.id == task_id, exists().where(User.id == user_id))
+        .values(user_id=user_id, version=Task.version + 1)
+    )
+    task, previous = await run_write(db, lambda db: _assign_task(db, stmt, task_id, Task.user_id, "User"))
+    _publish_tasks("assigned", [{**_task_dict(task), "previous_user_id": previous}])
     return task
 
 
 #przypisanie zadania do projektu jakiegos
 async def assign_task_to_project(db: AsyncSession, task_id: int, project_id: int):
-    task = await get_task_by_id(db, task_id)
-    result = await db.execute(select(Project).filter(Project.id == project_id))
-    project = result.scalars().first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-
-    task.project_id = project_id
-    await db.commit()
-    await db.refresh(task)
+    stmt = (
+        update(Task)
+        .where(Task.id == task_id, exists().where(Project.id == project_id))
+        .values(project_id=project_id, version=Task.version + 1)
+    )
+    task, previous = await run_write(db, lambda db: _assign_task(db, stmt, task_id, Task.project_id, "Project"))
+    _publish_tasks("assigned", [{**_task_dict(task), "previous_project_id": previous}])
     return task
 
 
-#zmiana statusu
-async def update_task_status(db: AsyncSession, task_id: int, status: str):
-    result = await db.execute(select(Task).filter(Task.id == task_id))
-    task = result.scalars().first()
-    if not task:
+#zwraca (task, poprzednia wartosc kolumny) - stara wartosc do zdarzenia "assigned"
+#(UPDATE ... RETURNING zwraca tylko nowe wartosci), odczytana w tej samej transakcji;
+#FOR UPDATE: w Postgresie nikt jej nie zmieni przed UPDATE, SQLite pomija (zapisy szeregowane)
+async def _assign_task(db: AsyncSession, stmt, task_id: int, column, target: str):
+    previous = (await db.execute(select(Task.id, column).where(Task.id == task_id).with_for_update())).first()
+    if previous is None:
         raise HTTPException(status_code=404, detail="Task not found")
+    task = await _write_task(db, stmt)
+    if not task:
+        raise HTTPException(status_code=404, detail=f"{target} not found")
+    return task, previous[1]
 
 
-    task.status = status
+#zmiana statusu
+async def update_task_status(db: AsyncSession, task_id: int, status: str, version: int | None = None):
+    stmt = (
+        update(Task)
+        .where(*_task_version_conditions(task_id, version))
+        .values(status=status, version=Task.version + 1)
+    )
+    task = await run_write(db, lambda db: _write_existing_task(db, stmt, task_id, version))
+    _publish_tasks("updated", [task])
+    return task
+
+
+#masowa zmiana statusu jednym UPDATE ... WHERE (RETURNING - zmienione taski do zdarzen)
+async def update_tasks_status_bulk(db: AsyncSession, data: TaskBulkStatusUpdate):
+    result = await db.execute(
+        update(Task)
+        .where(_locked_in_id_order(bulk_status_conditions(data)))
+        .values(status=data.status, version=Task.version + 1)
+        .returning(*_TASK_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    changed = result.all()
+    await db.commit()
+    _publish_tasks("updated", (row._asdict() for row in changed))
+    return {"updated": len(changed)}
+
+
+#masowy UPDATE blokuje wiersze w kolejnosci skanu, ktora w Postgresie zmienia sie z kazda nowa
+#wersja wiersza - dwa rownolegle zapisy masowe moga sie wtedy zakleszczyc; blokada wybranych
+#taskow w kolejnosci id (SELECT ... FOR UPDATE) przed zmiana; SQLite pomija FOR UPDATE
+def _locked_in_id_order(conditions: list):
+    return Task.id.in_(select(Task.id).where(*conditions).order_by(Task.id).with_for_update())
+
+
+#odpiecie taskow od usuwanego usera/projektu (column = Task.user_id albo Task.project_id)
+#jawnym UPDATE zamiast samego ON DELETE SET NULL - wersja taskow rosnie (ETag), a zwrocone
+#wiersze ida do zdarzen "assigned" z previous_* (subskrybent starego filtra widzi odpiecie)
+#bez commitu - wywolujacy usuwa wiersz w tej samej transakcji, a po commicie publikuje zdarzenia
+async def detach_tasks(db: AsyncSession, column, value: int) -> list:
+    result = await db.execute(
+        update(Task)
+        .where(_locked_in_id_order([column == value]))
+        .values({column.key: None, "version": Task.version + 1})
+        .returning(*_TASK_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    return [{**row._asdict(), f"previous_{column.key}": value} for row in result.all()]
+
+
+def publish_detached_tasks(tasks: list):
+    _publish_tasks("assigned", tasks)
+
+
+#warunki wyboru taskow do masowej zmiany statusu
+def bulk_status_conditions(data: TaskBulkStatusUpdate) -> list:
+    conditions = []
+    if data.ids is not None:
+        conditions.append(Task.id.in_(data.ids))
+    if data.project_id is not None:
+        conditions.append(Task.project_id == data.project_id)
+    if data.user_id is not None:
+        conditions.append(Task.user_id == data.user_id)
+    if data.current_status is not None:
+        conditions.append(Task.status == data.current_status)
+    #bez zadnego filtra zmienilibysmy cala tabele
+    if not conditions:
+        raise HTTPException(status_code=400, detail="At least one task selector is required")
+    return conditions
+
+
+#masowa zmiana statusu w zadaniu w tle: paczki po chunk_size taskow, kazda we wlasnej transakcji,
+#zeby nie trzymac blokady zapisu przez cala operacje; progress(zmienione, wszystkie) po kazdej paczce
+async def update_tasks_status_in_chunks(db: AsyncSession, data: TaskBulkStatusUpdate, chunk_size: int, progress=None):
+    conditions = bulk_status_conditions(data)
+    ids = (await db.execute(select(Task.id).where(*conditions).order_by(Task.id))).scalars().all()
     await db.commit()
-    await db.refresh(task)
-    return task
\ No newline at end of file
+    updated = 0
+    for start in range(0, len(ids), chunk_size):
+        #warunki powtorzone - task mogl sie zmienic od wybrania id
+        result = await db.execute(
+            update(Task)
+            .where(_locked_in_id_order([Task.id.in_(ids[start:start + chunk_size]), *conditions]))
+            .values(status=data.status, version=Task.version + 1)
+            .returning(*_TASK_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        changed = result.all()
+        await db.commit()
+        _publish_tasks("updated", (row._asdict() for row in changed))
+        updated += len(changed)
+        if progress is not None:
+            await progress(start + len(ids[start:start + chunk_size]), len(ids))
+    return {"updated": updated}
+
+
+#zapytanie uzytkownika jako fraza FTS5: kazde slowo w cudzyslowie (AND), bez skladni MATCH
+def _fts_query(q: str) -> str:
+    terms = [term.replace('"', '""') for term in q.split()]
+    return " ".join(f'"{term}"' for term in terms)
+
+
+#zapytanie wyszukiwania i jego ranking (mniejszy = lepszy): SQLite - FTS5 z bm25,
+#Postgres - tsvector z -ts_rank (znak odwrocony, zeby sortowanie i kursor byly takie same)
+def _search_query(q: str):
+    if engine.dialect.name == "postgresql":
+        tsquery = func.plainto_tsquery(literal_column("'simple'"), q)
+        rank = (-func.ts_rank(tasks_tsvector, tsquery)).label("rank")
+        return select(Task, rank).where(tasks_tsvector.op("@@")(tsquery)), rank
+
+    rank = tasks_fts.c.rank
+    query = (
+        select(Task, rank)
+        .join(tasks_fts, tasks_fts.c.rowid == Task.id)
+        .where(literal_column("tasks_fts").op("MATCH")(bindparam("match", _fts_query(q))))
+    )
+    return query, rank
+
+
+#wyszukiwanie pelnotekstowe po tytule i opisie, sortowane po trafnosci
+#kursor to (rank, id) ostatniego wyniku, wiec kolejne strony nie uzywaja OFFSET
+async def search_tasks(db: AsyncSession, q: str, limit: int = DEFAULT_PAGE_SIZE, after: str | None = None):
+    if not q.split():
+        raise HTTPException(status_code=400, detail="Empty search query")
+
+    query, rank = _search_query(q)
+    query = query.options(joinedload(Task.user), joinedload(Task.project))
+    if after is not None:
+        last_rank, last_id = decode_rank_cursor(after)
+        query = query.where(or_(rank > last_rank, and_(rank == last_rank, Task.id > last_id)))
+    result = await db.execute(query.order_by(rank, Task.id).limit(limit + 1))
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_task, last_rank = rows[-1]
+        next_cursor = encode_rank_cursor(last_rank, last_task.id)
+    return {"items": [task for task, _ in rows], "next_cursor": next_cursor}
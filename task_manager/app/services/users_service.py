@@ -1,63 +1,346 @@
 # app/services/users_service.py
+import asyncio
+import base64
+import codecs
+import csv
+import hashlib
+import hmac
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import insert, update, delete
+from sqlalchemy.exc import IntegrityError
+from pydantic import ValidationError
+from app.models.task import Task
 from app.models.user import User
-from app.schemas.user import UserCreate
+from app.schemas.user import UserCreate, UserResponse
+from app.services.pagination import DEFAULT_PAGE_SIZE, paginate
+from app.services.cache import user_cache
+from app.services.etag import make_etag, page_etag
+from app.services.serialization import rows_to_dicts
+from app.services.tasks_service import detach_tasks, publish_detached_tasks
+from app.config import PASSWORD_HASH_WORKERS, PASSWORD_SCRYPT_N, USER_IMPORT_BATCH_SIZE
+from app.db import dialect_insert
 
+#hasla hashowane scryptem w ograniczonej puli watkow - hashlib zwalnia GIL,
+#wiec ciezkie liczenie nie zatrzymuje petli zdarzen i innych requestow
+#pula tworzona przy pierwszym uzyciu, zeby po shutdown (koniec lifespan) dalo sie ja odtworzyc
+_password_pool: ThreadPoolExecutor | None = None
+_SCRYPT_R = 8
+_SCRYPT_P = 1
+
+
+#pamiec scrypta to ok. 128 * r * (n + p) bajtow; domyslny limit OpenSSL (32 MiB) odrzuca juz n = 2**15,
+#wiec limit liczony z parametrow (z zapasem) - tez dla zapisanych hashy z innym n niz obecne
+def _scrypt_maxmem(n: int, r: int, p: int) -> int:
+    return 128 * r * (n + p + 2) + 1024 * 1024
 
-async def create_user(db: AsyncSession, user_data: UserCreate):
-    #walidacja czy nie powiela sie email
-    result = await db.execute(select(User).filter(User.email == user_data.email))
-    existing_user = result.scalars().first()
-    if existing_user:
-        raise ValueError("User with this email already exists.")
 
-    #tworzenie uzytkownika
-    new_user = User(
-        name=user_data.name,
-        email=user_data.email,
-        password=user_data.password
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+#format: scrypt$n$r$p$sol$hash
+def _hash_password_sync(password: str) -> str:
+    salt = os.urandom(16)
+    digest = hashlib.scrypt(
+        password.encode(), salt=salt, n=PASSWORD_SCRYPT_N, r=_SCRYPT_R, p=_SCRYPT_P, dklen=32,
+        maxmem=_scrypt_maxmem(PASSWORD_SCRYPT_N, _SCRYPT_R, _SCRYPT_P),
     )
-    db.add(new_user)
-    await db.commit()
-    await db.refresh(new_user)
+    return f"scrypt${PASSWORD_SCRYPT_N}${_SCRYPT_R}${_SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+
+
+def _verify_password_sync(password: str, stored: str) -> bool:
+    parts = stored.split("$")
+    if len(parts) != 6 or parts[0] != "scrypt":
+        #stare konta z haslem zapisanym jawnie
+        return hmac.compare_digest(password.encode(), stored.encode())
+    n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+    salt, expected = base64.b64decode(parts[4]), base64.b64decode(parts[5])
+    digest = hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p, dklen=len(expected), maxmem=_scrypt_maxmem(n, r, p)
+    )
+    return hmac.compare_digest(digest, expected)
+
+
+def _get_password_pool() -> ThreadPoolExecutor:
+    global _password_pool
+    if _password_pool is None:
+        _password_pool = ThreadPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+        )
+    return _password_pool
+
+
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_password_pool(), _hash_password_sync, password)
+
+
+async def verify_password(password: str, stored: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_password_pool(), _verify_password_sync, password, stored)
+
+
+#zamkniecie puli przy wylaczaniu aplikacji
+def shutdown_password_pool():
+    global _password_pool
+    if _password_pool is not None:
+        _password_pool.shutdown(wait=True)
+        _password_pool = None
+
+
+async def create_user(db: AsyncSession, user_data: UserCreate):
+    #hash liczony przed otwarciem transakcji, zeby nie trzymac blokady zapisu
+    password_hash = await hash_password(user_data.password)
+    #tworzenie uzytkownika jednym INSERT ... RETURNING
+    #powtorzony email wylapuje unikalny indeks na User.email (bez wyscigu SELECT -> INSERT)
+    try:
+        result = await db.execute(
+            insert(User)
+            .values(name=user_data.name, email=user_data.email, password=password_hash)
+            .returning(User)
+        )
+        new_user = result.scalars().first()
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise ValueError("User with this email already exists.")
     return new_user
 
-#wyswietlanie uzytkownikow wszystkich
-async def get_all_users(db: AsyncSession):
-    result = await db.execute(select(User))
-    return result.scalars().all()
+#wyswietlanie uzytkownikow stronami (kursor po id)
+#slowniki z kolumnami UserResponse (bez hasla i bez obiektow ORM)
+async def get_all_users(db: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: str | None = None):
+    query = select(User.id, User.name, User.email, User.version)
+    page = await paginate(db, query, User.id, limit=limit, after=after, scalars=False)
+    page["items"] = rows_to_dicts(page["items"])
+    return page
+
+#wyswietlanie po ID (najpierw z cache)
+#version: aktualna wersja z bazy - wpis cache z inna wersja (zapis w innym procesie) jest pomijany
+async def get_user_by_id(db: AsyncSession, user_id: int, version: int | None = None):
+    cached = user_cache.get(user_id)
+    if cached is not None and (version is None or cached.version == version):
+        return cached
 
-#wyswietlanie po ID
-async def get_user_by_id(db: AsyncSession, user_id: int):
+    token = user_cache.token()
     result = await db.execute(select(User).filter(User.id == user_id))
     user = result.scalars().first()
     if not user:
         raise ValueError("User not found.")
+    #w cache trzymamy schemat bez hasla, a nie obiekt ORM
+    user = UserResponse.model_validate(user)
+    user_cache.set(user_id, user, token)
     return user
 
 #aktualizacja danych
+#email zajety przez innego usera wylapuje unikalny indeks, jak w create_user
 async def update_user(db: AsyncSession, user_id: int, user_data: UserCreate):
-    result = await db.execute(select(User).filter(User.id == user_id))
-    user = result.scalars().first()
+    password_hash = await hash_password(user_data.password)
+    try:
+        result = await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                name=user_data.name,
+                email=user_data.email,
+                password=password_hash,
+                version=User.version + 1,
+            )
+            .returning(User)
+            .execution_options(populate_existing=True)
+        )
+        user = result.scalars().first()
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise ValueError("User with this email already exists.")
+    user_cache.invalidate(user_id)
     if not user:
         raise ValueError("User not found.")
-
-    user.name = user_data.name
-    user.email = user_data.email
-    user.password = user_data.password
-    await db.commit()      #przepchanie danych a nizej odswiezenie DB
-    await db.refresh(user)
     return user
 
 #usuwanie
 async def delete_user(db: AsyncSession, user_id: int):
-    result = await db.execute(select(User).filter(User.id == user_id))
-    user = result.scalars().first()
-    if not user:
+    #taski odpinane przed usunieciem (zdarzenia i wersje)
+    detached = await detach_tasks(db, Task.user_id, user_id)
+    result = await db.execute(delete(User).where(User.id == user_id).returning(User.id))
+    if result.scalar() is None:
+        await db.rollback()
         raise ValueError("User not found.")
 
-    await db.delete(user)
     await db.commit()
+    user_cache.invalidate(user_id)
+    publish_detached_tasks(detached)
     return {"message": "User deleted successfully"}
 
+
+#wersja usera jednym SELECT po kluczu - zrodlo ETagu wspolne dla wszystkich procesow
+#(cache jest per proces, wiec ETag z cache mogl byc nieaktualny po zapisie w innym workerze)
+async def get_user_version(db: AsyncSession, user_id: int) -> int:
+    version = (await db.execute(select(User.version).where(User.id == user_id))).scalar()
+    if version is None:
+        raise ValueError("User not found.")
+    return version
+
+
+#ETag jednego usera z jego wersji
+def user_etag(user_id: int, version: int) -> str:
+    return make_etag("user", (user_id, version))
+
+
+#ETag strony listy userow
+async def get_users_page_etag(db: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: str | None = None):
+    query = select(User.id, User.version)
+    return await page_etag(db, "users", query, User.id, limit=limit, after=after)
+
+
+#linie z uploadu czytane strumieniowo (bez trzymania calego pliku w pamieci)
+#dekoder przyrostowy - znak wielobajtowy moze byc podzielony miedzy dwie paczki;
+#bledne bajty zostaja jako surrogateescape i odrzucaja tylko swoj wiersz (_is_valid_text)
+async def _iter_lines(chunks):
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="surrogateescape")
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+def _is_valid_text(line: str) -> bool:
+    try:
+        line.encode("utf-8")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+#rekord CSV dluzszy niz tyle znakow to blad (niezamkniety cudzyslow zbieralby caly plik)
+_MAX_CSV_RECORD = 16 * 1024
+
+
+#csv.reader prosi o kolejna linie, a rekord trwa dalej (pole w cudzyslowie przez koniec linii)
+class _NeedMoreLines(Exception):
+    pass
+
+
+def _record_lines(lines: list):
+    yield from lines
+    raise _NeedMoreLines
+
+
+#rekordy CSV (lista pol albo komunikat bledu); granice rekordow wyznacza csv.reader, bo pole
+#w cudzyslowie moze zawierac znak nowej linii - linie zbierane, dopoki parser prosi o kolejna
+#(reader zaczyna kazdy rekord od nowa, wiec rekord z kilku linii parsowany od pierwszej)
+async def _iter_csv_records(chunks):
+    lines, size = [], 0
+    async for line in _iter_lines(chunks):
+        lines.append(line + "\n")
+        size += len(line) + 1
+        try:
+            record = next(csv.reader(_record_lines(lines)))
+        except _NeedMoreLines:
+            if size <= _MAX_CSV_RECORD:
+                continue
+            record = "CSV record too long (unterminated quoted field?)"
+        except csv.Error as e:
+            record = str(e)
+        lines, size = [], 0
+        if record:
+            yield record
+    if lines:
+        yield "Unexpected end of data (unterminated quoted field)"
+
+
+#wiersze importu: CSV z naglowkiem albo NDJSON
+#zwraca (nr wiersza, slownik) albo (nr wiersza, komunikat bledu); w CSV wiersz = rekord
+async def _iter_import_rows(chunks, is_csv: bool):
+    if is_csv:
+        header = None
+        row_no = 0
+        async for record in _iter_csv_records(chunks):
+            if header is None and not isinstance(record, str):
+                header = record
+                continue
+            row_no += 1
+            if isinstance(record, str):
+                yield row_no, record
+            elif not all(_is_valid_text(field) for field in record):
+                yield row_no, "Invalid UTF-8"
+            else:
+                yield row_no, dict(zip(header, record))
+        return
+
+    row_no = 0
+    async for line in _iter_lines(chunks):
+        if not line.strip():
+            continue
+        row_no += 1
+        if not _is_valid_text(line):
+            yield row_no, "Invalid UTF-8"
+            continue
+        try:
+            yield row_no, json.loads(line)
+        except ValueError as e:
+            yield row_no, str(e)
+
+
+#zapis jednej paczki: hashe w puli, potem jeden INSERT ... ON CONFLICT (email) DO NOTHING
+#duplikaty (w bazie i w samej paczce) odrzuca unikalny indeks, a nie osobne SELECT-y
+async def _import_batch(db: AsyncSession, batch: list, report: list):
+    hashes = await asyncio.gather(*(hash_password(user.password) for _, user in batch))
+    result = await db.execute(
+        dialect_insert(User)
+        .values([
+            {"name": user.name, "email": user.email, "password": password_hash}
+            for (_, user), password_hash in zip(batch, hashes)
+        ])
+        .on_conflict_do_nothing(index_elements=["email"])
+        .returning(User.id, User.email)
+    )
+    created = dict((email, user_id) for user_id, email in result.all())
+    await db.commit()
+
+    for row_no, user in batch:
+        user_id = created.pop(user.email, None)
+        if user_id is not None:
+            report.append({"row": row_no, "status": "created", "email": user.email, "id": user_id})
+        else:
+            report.append({"row": row_no, "status": "duplicate", "email": user.email})
+
+
+#import userow z uploadu (CSV albo NDJSON) paczkami z raportem per wiersz
+#progress(liczba przetworzonych wierszy) po kazdej paczce (zadania w tle)
+async def import_users(db: AsyncSession, chunks, content_type: str | None, progress=None):
+    is_csv = "csv" in (content_type or "")
+    report, batch = [], []
+    async for row_no, data in _iter_import_rows(chunks, is_csv):
+        try:
+            if isinstance(data, str):
+                raise ValueError(data)
+            batch.append((row_no, UserCreate.model_validate(data)))
+        except (ValueError, ValidationError) as e:
+            report.append({"row": row_no, "status": "invalid", "error": str(e)})
+            continue
+        if len(batch) >= USER_IMPORT_BATCH_SIZE:
+            await _import_batch(db, batch, report)
+            batch = []
+            if progress is not None:
+                await progress(len(report))
+    if batch:
+        await _import_batch(db, batch, report)
+
+    report.sort(key=lambda row: row["row"])
+    statuses = [row["status"] for row in report]
+    return {
+        "created": statuses.count("created"),
+        "duplicates": statuses.count("duplicate"),
+        "invalid": statuses.count("invalid"),
+        "rows": report,
+    }
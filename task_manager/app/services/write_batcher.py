@@ -0,0 +1,148 @@
+# app/services/write_batcher.py
+import asyncio
+import logging
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import WRITE_BATCHING, WRITE_BATCH_WINDOW, WRITE_BATCH_MAX
+from app.db import AsyncSessionLocal
+
+#grupowy commit zapisow (opt-in, WRITE_BATCHING=1): SQLite ma jednego pisarza, wiec zamiast
+#commitu per request zapisy z rownoleglych requestow ida w jednej transakcji
+#operacja = async fn(db) wykonujaca zapis bez commitu; wynik albo blad wraca do jej wywolujacego
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBatcher:
+    def __init__(self, window: float, max_batch: int):
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = None
+        self._worker = None
+        self.batches = 0
+        self.operations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._worker is not None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Write batcher stopped"))
+
+    async def submit(self, operation):
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((operation, future))
+        return await future
+
+    #paczka: wszystko co juz czeka, potem dobieranie do max_batch najdluzej przez window sekund
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            try:
+                await self._commit_batch(batch)
+            except Exception:
+                logger.exception("Write batch failed")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError("Write batch failed"))
+
+    async def _commit_batch(self, batch: list):
+        #operacje, na ktorych wynik nikt juz nie czeka (klient sie rozlaczyl), sa pomijane
+        batch = [(operation, future) for operation, future in batch if not future.done()]
+        if not batch:
+            return
+        outcomes = []
+        async with AsyncSessionLocal() as db:
+            try:
+                for operation, future in batch:
+                    try:
+                        outcomes.append((future, await operation(db), None))
+                    except SQLAlchemyError:
+                        raise
+                    except Exception as e:
+                        #bledy aplikacji (np. 404) powstaja przed zapisem - reszta paczki zostaje
+                        outcomes.append((future, None, e))
+                await db.commit()
+            except SQLAlchemyError:
+                #blad bazy psuje cala transakcje - kazda operacja jeszcze raz osobno
+                await db.rollback()
+                await self._run_individually(batch)
+                return
+        self.batches += 1
+        self.operations += len(batch)
+        for future, result, error in outcomes:
+            _resolve(future, result, error)
+
+    async def _run_individually(self, batch: list):
+        for operation, future in batch:
+            async with AsyncSessionLocal() as db:
+                try:
+                    result = await operation(db)
+                    await db.commit()
+                except Exception as e:
+                    await db.rollback()
+                    _resolve(future, None, e)
+                    continue
+            self.batches += 1
+            self.operations += 1
+            _resolve(future, result, None)
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "batches": self.batches, "operations": self.operations}
+
+
+def _resolve(future, result, error):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+write_batcher = WriteBatcher(WRITE_BATCH_WINDOW, WRITE_BATCH_MAX)
+
+
+#zapis przez batcher (gdy wlaczony) albo od razu w sesji requestu; po powrocie zapis jest zatwierdzony
+async def run_write(db: AsyncSession, operation):
+    if not write_batcher.enabled:
+        result = await operation(db)
+        await db.commit()
+        return result
+    #koniec transakcji odczytu requestu - jej blokada wstrzymywalaby commit paczki
+    await db.commit()
+    return await write_batcher.submit(operation)
+
+
+def start_write_batcher():
+    if WRITE_BATCHING:
+        write_batcher.start()
@@ -0,0 +1,80 @@
+# benchmarks/bench_admission.py
+#skok ruchu: --burst requestow naraz (listy i zapisy taskow) bez limitow i z kontrola przyjmowania
+#uruchomienie z katalogu task_manager:  python -m benchmarks.bench_admission [--burst 1000] [--postgres]
+#limity z ADMISSION_LIMITS / ADMISSION_QUEUE_TIMEOUT (domyslnie ponizsze, w aplikacji wylaczone);
+#opoznienia tylko obsluzonych requestow
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import add_database_args, setup_database, summary
+
+
+async def request(client, i: int, latencies: list, statuses: dict):
+    start = time.perf_counter()
+    try:
+        if i % 4:
+            response = await client.get("/tasks/", params={"limit": 100})
+        else:
+            response = await client.post("/tasks/", json={"title": f"burst {i}", "project_id": 1})
+        key = str(response.status_code)
+    except Exception as e:
+        key = type(e).__name__
+    #opoznienia tylko obsluzonych requestow - odrzucone licza sie osobno
+    if key == "200":
+        latencies.append(time.perf_counter() - start)
+    statuses[key] = statuses.get(key, 0) + 1
+
+
+async def burst(client, args) -> dict:
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*(request(client, i, latencies, statuses) for i in range(args.burst)))
+    return {"elapsed_s": round(time.perf_counter() - start, 2), "statuses": statuses, **summary(latencies)}
+
+
+async def run(args):
+    import logging
+    from app.main import app
+    from app.admission import admission
+
+    logging.disable(logging.INFO)
+    transport = httpx.ASGITransport(app=app)
+    results = {"burst": args.burst, "database": args.database, "limits": os.environ.get("ADMISSION_LIMITS")}
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            await client.post("/projects/", json={"name": "bench"})
+            await client.post("/tasks/bulk", json=[{"title": f"seed {i}", "project_id": 1} for i in range(args.tasks)])
+
+            limiters, admission.limiters = admission.limiters, {}
+            results["no_limits"] = await burst(client, args)
+            admission.limiters = limiters
+            results["admission_control"] = await burst(client, args)
+            results["admission_control"]["limiters"] = admission.stats()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--burst", type=int, default=1000)
+    parser.add_argument("--tasks", type=int, default=5000)
+    add_database_args(parser)
+    args = parser.parse_args()
+
+    os.environ.setdefault("ADMISSION_LIMITS", "* GET=16/32, * *=8/16")
+
+    #baza w katalogu tymczasowym (SQLite ./test.db albo dane wbudowanego Postgresa)
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="bench_admission_"))
+    args.database = setup_database(args, os.getcwd())
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# benchmarks/bench_serialization.py
+#czas budowania odpowiedzi list (tasks/users/projects) dla duzych stron:
+#  legacy - obiekty ORM (joinedload) -> walidacja response_model (from_attributes) -> json
+#  fast   - wiersze z wybranych kolumn -> slowniki -> orjson (obecna sciezka routerow)
+#uruchomienie z katalogu task_manager:  python -m benchmarks.bench_serialization [--rows 10000 100000]
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import add_database_args, setup_database
+
+
+def legacy_body(adapter, page) -> bytes:
+    from fastapi.responses import JSONResponse
+
+    #to samo co FastAPI robi z response_model: walidacja + dump w trybie json + JSONResponse
+    value = adapter.validate_python(page, from_attributes=True)
+    return JSONResponse(adapter.dump_python(value, mode="json")).body
+
+
+async def seed(rows: int):
+    from sqlalchemy import insert
+    from app.db import AsyncSessionLocal
+    from app.models.user import User
+    from app.models.projects import Project
+    from app.models.task import Task
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(User.__table__), [
+            {"name": f"user{i}", "email": f"user{i}@example.com", "password": "x"} for i in range(rows)
+        ])
+        await db.execute(insert(Project.__table__), [
+            {"name": f"project{i}", "description": "benchmark"} for i in range(rows)
+        ])
+        await db.execute(insert(Task.__table__), [
+            {"title": f"task {i}", "description": "benchmark task", "status": "todo",
+             "user_id": i % rows + 1 if i % 3 else None, "project_id": i % rows + 1} for i in range(rows)
+        ])
+        await db.commit()
+
+
+async def measure(build, repeat: int) -> dict:
+    from app.db import AsyncSessionLocal
+
+    times, size = [], 0
+    for _ in range(repeat):
+        #nowa sesja za kazdym razem - bez obiektow z poprzedniego przebiegu w identity map
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            size = len(await build(db))
+            times.append(time.perf_counter() - start)
+    return {"best_ms": round(min(times) * 1000, 1), "bytes": size}
+
+
+async def run(args):
+    import logging
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+    from sqlalchemy.orm import joinedload
+    from app.main import app
+    from app.models.user import User
+    from app.models.projects import Project
+    from app.models.task import Task
+    from app.schemas.pagination import Page
+    from app.schemas.task import TaskResponse
+    from app.schemas.user import UserResponse
+    from app.schemas.projects import ProjectResponse
+    from app.services.serialization import FastJSONResponse, orjson
+    from app.services.tasks_service import get_all_tasks
+    from app.services.users_service import get_all_users
+    from app.services.projects_service import get_all_projects
+
+    logging.disable(logging.INFO)
+    endpoints = {
+        "tasks": (select(Task).options(joinedload(Task.user), joinedload(Task.project)), Task.id, TaskResponse, get_all_tasks),
+        "users": (select(User), User.id, UserResponse, get_all_users),
+        "projects": (select(Project), Project.id, ProjectResponse, get_all_projects),
+    }
+
+    results = {"encoder": "orjson" if orjson is not None else "json", "database": args.database}
+    async with app.router.lifespan_context(app):
+        await seed(max(args.rows))
+        for rows in args.rows:
+            for name, (query, id_column, schema, fast) in endpoints.items():
+                adapter = TypeAdapter(Page[schema])
+
+                async def legacy(db):
+                    result = await db.execute(query.order_by(id_column).limit(rows))
+                    return legacy_body(adapter, {"items": result.scalars().all(), "next_cursor": None})
+
+                async def optimized(db):
+                    return FastJSONResponse(await fast(db, limit=rows)).body
+
+                old = await measure(legacy, args.repeat)
+                new = await measure(optimized, args.repeat)
+                results[f"{name} x {rows}"] = {
+                    "legacy": old,
+                    "fast": new,
+                    "speedup": round(old["best_ms"] / new["best_ms"], 2),
+                }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    add_database_args(parser)
+    args = parser.parse_args()
+
+    #baza w katalogu tymczasowym (SQLite ./test.db albo dane wbudowanego Postgresa)
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="bench_serialization_"))
+    args.database = setup_database(args, os.getcwd())
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/bench_signup.py
+#opoznienie lekkich requestow (GET /projects/1) w trakcie rownoleglych rejestracji userow
+#uruchomienie z katalogu task_manager:  python -m benchmarks.bench_signup [--signups 200] [--inline]
+#--inline liczy hash bezposrednio w petli zdarzen (dla porownania z pula watkow)
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import add_database_args, setup_database, summary
+
+
+async def probe(client, stop: asyncio.Event, latencies: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/projects/1")
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200
+        await asyncio.sleep(0.005)
+
+
+async def signup(client, i: int, semaphore: asyncio.Semaphore, errors: list):
+    async with semaphore:
+        try:
+            response = await client.post(
+                "/users/", json={"name": f"user{i}", "email": f"user{i}@example.com", "password": "secret"}
+            )
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        except Exception as e:
+            #np. "database is locked", gdy petla stoi na hashowaniu dluzej niz timeout SQLite
+            errors.append(type(e).__name__)
+
+
+async def run(args):
+    import logging
+    from app.main import app
+
+    logging.disable(logging.INFO)
+    from app.services import users_service
+
+    if args.inline:
+        async def inline_hash(password):
+            return users_service._hash_password_sync(password)
+        users_service.hash_password = inline_hash
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.post("/projects/", json={"name": "bench"})
+
+            #faza 1: same lekkie requesty
+            idle, stop = [], asyncio.Event()
+            task = asyncio.create_task(probe(client, stop, idle))
+            await asyncio.sleep(args.duration)
+            stop.set()
+            await task
+
+            #faza 2: te same requesty w trakcie rejestracji
+            loaded, stop = [], asyncio.Event()
+            task = asyncio.create_task(probe(client, stop, loaded))
+            semaphore, errors = asyncio.Semaphore(args.concurrency), []
+            start = time.perf_counter()
+            await asyncio.gather(*(signup(client, i, semaphore, errors) for i in range(args.signups)))
+            signup_time = time.perf_counter() - start
+            stop.set()
+            await task
+
+    return {
+        "mode": "inline" if args.inline else "pool",
+        "database": args.database,
+        "signups": args.signups,
+        "concurrency": args.concurrency,
+        "signups_per_s": round(args.signups / signup_time, 1),
+        "signup_errors": len(errors),
+        "probe_idle": summary(idle),
+        "probe_during_signups": summary(loaded),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--signups", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--inline", action="store_true")
+    add_database_args(parser)
+    args = parser.parse_args()
+
+    #baza w katalogu tymczasowym (SQLite ./test.db albo dane wbudowanego Postgresa)
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="bench_signup_"))
+    args.database = setup_database(args, os.getcwd())
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
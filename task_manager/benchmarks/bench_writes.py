@@ -0,0 +1,84 @@
+# benchmarks/bench_writes.py
+#przepustowosc rownoleglych zapisow (POST /tasks/ i PUT /tasks/{id}/status/) z grupowym commitem i bez
+#uruchomienie z katalogu task_manager:  python -m benchmarks.bench_writes [--writes 2000] [--concurrency 50]
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import add_database_args, setup_database, summary
+
+TASK_STATUSES = ["todo", "doing", "done"]
+
+
+async def writer(client, i: int, semaphore: asyncio.Semaphore, latencies: list, errors: dict):
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            if i % 2:
+                response = await client.post("/tasks/", json={"title": f"task {i}", "project_id": 1})
+            else:
+                response = await client.put(f"/tasks/{i // 2 + 1}/status/", params={"status": TASK_STATUSES[i % 3]})
+            key = str(response.status_code) if response.status_code != 200 else None
+        except Exception as e:
+            #bez batchera: "database is locked", gdy zapis czeka dluzej niz timeout SQLite
+            key = type(e).__name__
+        latencies.append(time.perf_counter() - start)
+        if key:
+            errors[key] = errors.get(key, 0) + 1
+
+
+async def measure(client, args) -> dict:
+    semaphore, latencies, errors = asyncio.Semaphore(args.concurrency), [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(client, i, semaphore, latencies, errors) for i in range(args.writes)))
+    elapsed = time.perf_counter() - start
+    return {"writes_per_s": round(args.writes / elapsed, 1), "errors": errors, **summary(latencies)}
+
+
+async def run(args):
+    import logging
+    from app.main import app
+    from app.services.write_batcher import write_batcher
+
+    logging.disable(logging.INFO)
+    transport = httpx.ASGITransport(app=app)
+    results = {"writes": args.writes, "concurrency": args.concurrency, "database": args.database}
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            await client.post("/projects/", json={"name": "bench"})
+            await client.post("/tasks/bulk", json=[{"title": f"seed {i}"} for i in range(args.writes)])
+
+            if write_batcher.enabled:
+                await write_batcher.stop()
+            results["commit_per_request"] = await measure(client, args)
+
+            write_batcher.start()
+            results["write_batcher"] = await measure(client, args)
+            results["write_batcher"]["avg_batch"] = round(
+                write_batcher.operations / max(write_batcher.batches, 1), 1
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    add_database_args(parser)
+    args = parser.parse_args()
+
+    #baza w katalogu tymczasowym (SQLite ./test.db albo dane wbudowanego Postgresa)
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="bench_writes_"))
+    args.database = setup_database(args, os.getcwd())
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+# benchmarks/load.py
+#obciazeniowy benchmark HTTP wszystkich endpointow (users, projects, tasks)
+#uruchomienie z katalogu task_manager:
+#  python -m benchmarks.load                              #aplikacja w procesie (ASGI)
+#  python -m benchmarks.load --uvicorn                    #aplikacja pod uvicornem na wolnym porcie
+#  python -m benchmarks.load --url http://localhost:8000  #juz dzialajacy serwer
+#  python -m benchmarks.load --postgres                   #baza: wbudowany Postgres (albo --database-url)
+#  python -m benchmarks.load --output wynik.json --baseline baseline.json
+#kazdy endpoint mierzony osobno: --requests zapytan wysylanych przez --concurrency klientow
+#wynik (JSON): throughput i p50/p95/p99 per endpoint; z --baseline porownanie i kod wyjscia 1 przy regresji
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+
+from benchmarks.common import add_database_args, setup_database, summary
+
+TASK_STATUSES = ["todo", "doing", "done"]
+SEARCH_WORDS = ["alpha", "beta", "gamma", "delta", "release", "bug", "docs", "review"]
+
+
+#scenariusz: nazwa endpointu + funkcja budujaca (metoda, sciezka, kwargs) dla i-tego zapytania
+class Scenario:
+    def __init__(self, name, build, requests=None):
+        self.name = name
+        self.build = build
+        self.requests = requests
+
+
+def _words(rng, n):
+    return " ".join(rng.choice(SEARCH_WORDS) for _ in range(n))
+
+
+#stan wspoldzielony przez scenariusze: zakresy id z seedowania
+class State:
+    def __init__(self, args):
+        self.rng = random.Random(args.seed)
+        self.users = args.users
+        self.projects = args.projects
+        self.tasks = args.tasks
+        #osobne pule id do usuwania, zeby DELETE nie trafial w dane innych scenariuszy
+        self.deletable = {"users": [], "projects": [], "tasks": []}
+        self.counter = 0
+        self.job_id = None
+
+    def user_id(self):
+        return self.rng.randint(1, self.users)
+
+    def project_id(self):
+        return self.rng.randint(1, self.projects)
+
+    def task_id(self):
+        return self.rng.randint(1, self.tasks)
+
+    def unique(self):
+        self.counter += 1
+        return self.counter
+
+
+def build_scenarios(state: State, args):
+    rng = state.rng
+
+    def task_body():
+        return {"title": _words(rng, 3), "description": _words(rng, 8), "status": rng.choice(TASK_STATUSES)}
+
+    return [
+        #users
+        Scenario("POST /users/", lambda: ("POST", "/users/", {"json": {
+            "name": "bench", "email": f"load{state.unique()}@example.com", "password": "secret"}})),
+        Scenario("GET /users/", lambda: ("GET", "/users/", {"params": {"limit": 50}})),
+        Scenario("GET /users/users/{user_id}", lambda: ("GET", f"/users/users/{state.user_id()}", {})),
+        Scenario("PUT /users/{user_id}", lambda: (lambda i: ("PUT", f"/users/{i}", {"json": {
+            "name": "bench", "email": f"user{i}@example.com", "password": "secret"}}))(state.user_id())),
+        Scenario("DELETE /users/{user_id}", lambda: ("DELETE", f"/users/{state.deletable['users'].pop()}", {}),
+                 requests=args.deletable),
+        Scenario("POST /users/import", lambda: ("POST", "/users/import", {
+            "content": "".join(json.dumps({"name": "imp", "email": f"imp{state.unique()}@example.com",
+                                           "password": "secret"}) + "\n" for _ in range(20)),
+            "headers": {"content-type": "application/x-ndjson"}}), requests=max(1, args.requests // 10)),
+        #projects
+        Scenario("POST /projects/", lambda: ("POST", "/projects/", {"json": {"name": _words(rng, 2)}})),
+        Scenario("GET /projects/", lambda: ("GET", "/projects/", {"params": {"limit": 50}})),
+        Scenario("GET /projects/{project_id}", lambda: ("GET", f"/projects/{state.project_id()}", {})),
+        Scenario("GET /projects/{project_id}/stats", lambda: ("GET", f"/projects/{state.project_id()}/stats", {})),
+        Scenario("PUT /projects/{project_id}", lambda: ("PUT", f"/projects/{state.project_id()}", {
+            "json": {"name": _words(rng, 2), "description": _words(rng, 5)}})),
+        Scenario("DELETE /projects/{project_id}", lambda: (
+            "DELETE", f"/projects/{state.deletable['projects'].pop()}", {}), requests=args.deletable),
+        #tasks
+        Scenario("POST /tasks/", lambda: ("POST", "/tasks/", {"json": {
+            **task_body(), "user_id": state.user_id(), "project_id": state.project_id()}})),
+        Scenario("POST /tasks/bulk", lambda: ("POST", "/tasks/bulk", {"json": [
+            {**task_body(), "project_id": state.project_id()} for _ in range(100)]}),
+                 requests=max(1, args.requests // 10)),
+        Scenario("GET /tasks/", lambda: ("GET", "/tasks/", {"params": {"limit": 50}})),
+        Scenario("GET /tasks/ (filtered)", lambda: ("GET", "/tasks/", {"params": {
+            "limit": 50, "project_id": state.project_id(), "status": rng.choice(TASK_STATUSES)}})),
+        Scenario("GET /tasks/ (sparse)", lambda: ("GET", "/tasks/", {"params": {
+            "limit": 50, "fields": "id,title,status"}})),
+        Scenario("GET /tasks/{task_id}", lambda: ("GET", f"/tasks/{state.task_id()}", {})),
+        Scenario("GET /tasks/search", lambda: ("GET", "/tasks/search", {"params": {
+            "q": rng.choice(SEARCH_WORDS), "limit": 20}})),
+        Scenario("GET /tasks/export", lambda: ("GET", "/tasks/export", {}), requests=args.export_requests),
+        Scenario("PUT /tasks/{task_id}", lambda: ("PUT", f"/tasks/{state.task_id()}", {"json": task_body()})),
+        Scenario("PUT /tasks/{task_id}/status/", lambda: ("PUT", f"/tasks/{state.task_id()}/status/", {
+            "params": {"status": rng.choice(TASK_STATUSES)}})),
+        Scenario("PUT /tasks/{task_id}/assign-user/{user_id}", lambda: (
+            "PUT", f"/tasks/{state.task_id()}/assign-user/{state.user_id()}", {})),
+        Scenario("PUT /tasks/{task_id}/assign-project/{project_id}", lambda: (
+            "PUT", f"/tasks/{state.task_id()}/assign-project/{state.project_id()}", {})),
+        Scenario("PUT /tasks/bulk/status", lambda: ("PUT", "/tasks/bulk/status", {"json": {
+            "status": rng.choice(TASK_STATUSES), "ids": [state.task_id() for _ in range(50)]}})),
+        Scenario("DELETE /tasks/{task_id}", lambda: ("DELETE", f"/tasks/{state.deletable['tasks'].pop()}", {}),
+                 requests=args.deletable),
+        Scenario("POST /jobs/tasks/bulk-status", lambda: ("POST", "/jobs/tasks/bulk-status", {"json": {
+            "status": rng.choice(TASK_STATUSES), "ids": [state.task_id() for _ in range(50)]}})),
+        Scenario("GET /jobs/{job_id}", lambda: ("GET", f"/jobs/{state.job_id}", {})),
+        Scenario("GET /metrics", lambda: ("GET", "/metrics", {})),
+    ]
+
+
+#dane startowe przez API (bulk/import), plus osobne rekordy przeznaczone do usuwania
+async def seed(client: httpx.AsyncClient, state: State, args):
+    rng = state.rng
+    batch = 500
+
+    total_users = args.users + args.deletable
+    for start in range(0, total_users, batch):
+        lines = "".join(
+            json.dumps({"name": f"user{i}", "email": f"user{i}@example.com", "password": "secret"}) + "\n"
+            for i in range(start + 1, min(total_users, start + batch) + 1)
+        )
+        response = await client.post("/users/import", content=lines,
+                                     headers={"content-type": "application/x-ndjson"}, timeout=None)
+        response.raise_for_status()
+    state.deletable["users"] = list(range(args.users + 1, total_users + 1))
+
+    for i in range(args.projects + args.deletable):
+        response = await client.post("/projects/", json={"name": f"project{i}", "description": _words(rng, 5)})
+        response.raise_for_status()
+    state.deletable["projects"] = list(range(args.projects + 1, args.projects + args.deletable + 1))
+
+    total_tasks = args.tasks + args.deletable
+    for start in range(0, total_tasks, batch):
+        body = [
+            {
+                "title": _words(rng, 3),
+                "description": _words(rng, 8),
+                "status": rng.choice(TASK_STATUSES),
+                "user_id": rng.randint(1, args.users),
+                "project_id": rng.randint(1, args.projects),
+            }
+            for _ in range(start, min(total_tasks, start + batch))
+        ]
+        response = await client.post("/tasks/bulk", json=body, timeout=None)
+        response.raise_for_status()
+    state.deletable["tasks"] = list(range(args.tasks + 1, total_tasks + 1))
+
+    #jedno zadanie w tle do odpytywania o stan
+    response = await client.post("/jobs/tasks/bulk-status", json={"status": "todo", "ids": [1]})
+    response.raise_for_status()
+    state.job_id = response.json()["id"]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int):
+    latencies, errors = [], {}
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            method, path, kwargs = scenario.build()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, timeout=None, **kwargs)
+                await response.aread()
+                status = response.status_code
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            if not (isinstance(status, int) and status < 400):
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "errors": errors,
+        **summary(latencies),
+    }
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+#klient HTTP dla wybranego trybu: w procesie, uvicorn w podprocesie albo zewnetrzny URL
+#baza (./test.db z app/db.py) trafia do katalogu tymczasowego
+@asynccontextmanager
+async def open_client(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits) as client:
+            yield client
+        return
+
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    app_dir = os.getcwd()
+    #przed startem aplikacji - uvicorn dziedziczy DATABASE_URL przez srodowisko
+    args.database = setup_database(args, workdir)
+    if args.uvicorn:
+        port = _free_port()
+        env = {**os.environ, "PYTHONPATH": app_dir + os.pathsep + os.environ.get("PYTHONPATH", "")}
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=workdir, env=env,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+                for _ in range(100):
+                    try:
+                        await client.get("/cache/stats")
+                        break
+                    except httpx.TransportError:
+                        await asyncio.sleep(0.1)
+                yield client
+        finally:
+            server.terminate()
+            server.wait()
+        return
+
+    sys.path.insert(0, app_dir)
+    os.chdir(workdir)
+    import logging
+    from app.main import app
+
+    logging.disable(logging.INFO)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            yield client
+
+
+#porownanie z zapisanym baseline: regresja gdy p95 rosnie albo throughput spada o wiecej niz prog
+def compare(results: dict, baseline: dict, threshold: float):
+    report, regressions = {}, []
+    for name, current in results["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before or "p95_ms" not in before or "p95_ms" not in current:
+            continue
+        p95_change = (current["p95_ms"] - before["p95_ms"]) / max(before["p95_ms"], 1e-9) * 100
+        rps_change = (current["throughput_rps"] - before["throughput_rps"]) / max(before["throughput_rps"], 1e-9) * 100
+        regressed = p95_change > threshold or rps_change < -threshold
+        report[name] = {
+            "p95_change_pct": round(p95_change, 1),
+            "throughput_change_pct": round(rps_change, 1),
+            "regression": regressed,
+        }
+        if regressed:
+            regressions.append(name)
+    return report, regressions
+
+
+async def run(args):
+    state = State(args)
+    scenarios = build_scenarios(state, args)
+    if args.only:
+        scenarios = [s for s in scenarios if any(part in s.name for part in args.only)]
+
+    async with open_client(args) as client:
+        start = time.perf_counter()
+        await seed(client, state, args)
+        seed_time = time.perf_counter() - start
+
+        endpoints = {}
+        for scenario in scenarios:
+            requests = scenario.requests if scenario.requests is not None else args.requests
+            endpoints[scenario.name] = await run_scenario(client, scenario, requests, args.concurrency)
+            print(f"{scenario.name}: {endpoints[scenario.name]}", file=sys.stderr)
+
+    return {
+        "meta": {
+            "mode": "url" if args.url else "uvicorn" if args.uvicorn else "asgi",
+            "database": args.database,
+            "users": args.users,
+            "projects": args.projects,
+            "tasks": args.tasks,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "seed_time_s": round(seed_time, 2),
+            "password_scrypt_n": os.environ.get("PASSWORD_SCRYPT_N"),
+        },
+        "endpoints": endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load benchmark for the task manager API")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--export-requests", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--only", nargs="*", help="run only endpoints whose name contains one of these")
+    parser.add_argument("--uvicorn", action="store_true", help="run the app under uvicorn in a subprocess")
+    parser.add_argument("--url", help="benchmark an already running server (must start with an empty database)")
+    add_database_args(parser)
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--baseline", help="compare against a stored results JSON")
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed regression in percent")
+    args = parser.parse_args()
+    args.deletable = args.requests
+    args.database = None  #--url: baza po stronie serwera
+
+    #tanszy scrypt, zeby seedowanie userow nie dominowalo czasu (zapisywane w meta)
+    os.environ.setdefault("PASSWORD_SCRYPT_N", "1024")
+
+    results = asyncio.run(run(args))
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            results["comparison"], regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"regressions: {', '.join(regressions)}", file=sys.stderr)
+            exit_code = 1
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# tests/__init__.py
+import os
+import tempfile
+import unittest
+import uuid
+
+#config czyta zmienne srodowiskowe przy imporcie app - osobna baza i katalog plikow dla testow
+#oraz tani scrypt, ustawione zanim jakikolwiek test zaimportuje aplikacje
+TEST_DIR = tempfile.mkdtemp(prefix="task_manager_tests_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}")
+os.environ.setdefault("JOB_FILES_DIR", os.path.join(TEST_DIR, "job_files"))
+os.environ.setdefault("PASSWORD_SCRYPT_N", "1024")
+
+
+def unique(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:8]}"
+
+
+#aplikacja z lifespan (migracje, workery zadan) i klient httpx przez ASGI; baza wspolna dla testow,
+#wiec testy tworza wlasne projekty/userow; kazdy test ma wlasna petle zdarzen, dlatego
+#polaczenia z pul sa zamykane po tescie
+class AppTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        import httpx
+        from app.main import app
+
+        self._lifespan = app.router.lifespan_context(app)
+        await self._lifespan.__aenter__()
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        from app.db import engine, read_engine
+
+        await self.client.aclose()
+        await self._lifespan.__aexit__(None, None, None)
+        await engine.dispose()
+        await read_engine.dispose()
+
+    async def create_task(self, **fields) -> dict:
+        project = (await self.client.post("/projects/", json={"name": unique("project")})).json()
+        response = await self.client.post("/tasks/", json={"title": "task", "project_id": project["id"], **fields})
+        self.assertEqual(response.status_code, 200, response.text)
+        return response.json()
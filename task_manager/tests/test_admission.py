@@ -0,0 +1,133 @@
+import asyncio
+import unittest
+
+import httpx
+from starlette.responses import PlainTextResponse
+
+from app.admission import AdmissionControl, AdmissionMiddleware, ConcurrencyLimiter, parse_admission_limits
+from app.config import ADMISSION_RETRY_AFTER
+
+
+#aplikacja ASGI, ktora trzyma request az do zwolnienia bramki
+class BlockingApp:
+    def __init__(self):
+        self.gate = asyncio.Event()
+
+    async def __call__(self, scope, receive, send):
+        if scope["path"] != "/fast":
+            await self.gate.wait()
+        await PlainTextResponse("ok")(scope, receive, send)
+
+
+async def _wait_for(condition):
+    while not condition():
+        await asyncio.sleep(0)
+
+
+#kolejka limitera: przyjecie, odrzucenie przy pelnej kolejce, timeout i kolejnosc FIFO
+class TestConcurrencyLimiter(unittest.IsolatedAsyncioTestCase):
+
+    #sprawdza, czy miejsca sa przekazywane czekajacym w kolejnosci przyjscia
+    async def test_release_admits_waiters_in_fifo_order(self):
+        limiter = ConcurrencyLimiter("test", limit=1, max_queue=3, timeout=5)
+        self.assertIsNone(await limiter.acquire())
+        order = []
+
+        async def waiter(number):
+            self.assertIsNone(await limiter.acquire())
+            order.append(number)
+            limiter.release()
+
+        waiters = [asyncio.create_task(waiter(number)) for number in range(3)]
+        await _wait_for(lambda: limiter.queue_depth == 3)
+        limiter.release()
+        await asyncio.gather(*waiters)
+        self.assertEqual(order, [0, 1, 2])
+        self.assertEqual((limiter.active, limiter.queue_depth, limiter.admitted), (0, 0, 4))
+
+    #sprawdza, czy przy pelnej kolejce request jest odrzucany od razu
+    async def test_queue_full(self):
+        limiter = ConcurrencyLimiter("test", limit=1, max_queue=1, timeout=5)
+        await limiter.acquire()
+        queued = asyncio.create_task(limiter.acquire())
+        await _wait_for(lambda: limiter.queue_depth == 1)
+        self.assertEqual(await limiter.acquire(), "queue_full")
+        limiter.release()
+        self.assertIsNone(await queued)
+        self.assertEqual(limiter.rejected, {"queue_full": 1, "timeout": 0})
+
+    #sprawdza, czy request po timeoucie w kolejce jest odrzucany i nie zostaje w kolejce
+    async def test_timeout(self):
+        limiter = ConcurrencyLimiter("test", limit=1, max_queue=1, timeout=0.05)
+        await limiter.acquire()
+        self.assertEqual(await limiter.acquire(), "timeout")
+        self.assertEqual((limiter.active, limiter.queue_depth), (1, 0))
+        limiter.release()
+        self.assertEqual(limiter.active, 0)
+
+
+#middleware: 429 przy pelnej kolejce, 503 po timeoucie, oba z Retry-After
+class TestAdmissionMiddleware(unittest.IsolatedAsyncioTestCase):
+
+    def _client(self, spec: str, timeout: float):
+        self.app = BlockingApp()
+        self.control = AdmissionControl(parse_admission_limits(spec), timeout, ("/fast",))
+        self.limiter = self.control.limiter_for("GET", "/slow")
+        transport = httpx.ASGITransport(app=AdmissionMiddleware(self.app, control=self.control))
+        return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+    def _assert_rejected(self, response, status: int):
+        self.assertEqual(response.status_code, status)
+        self.assertEqual(response.headers["retry-after"], str(ADMISSION_RETRY_AFTER))
+
+    #sprawdza, czy request ponad limit i kolejke dostaje 429, a przyjete koncza sie poprawnie
+    async def test_queue_full_returns_429(self):
+        async with self._client("* *=1/1", timeout=5) as client:
+            active = asyncio.create_task(client.get("/slow"))
+            await _wait_for(lambda: self.limiter.active == 1)
+            queued = asyncio.create_task(client.get("/slow"))
+            await _wait_for(lambda: self.limiter.queue_depth == 1)
+
+            self._assert_rejected(await client.get("/slow"), 429)
+            self.app.gate.set()
+            self.assertEqual([(await active).status_code, (await queued).status_code], [200, 200])
+        self.assertEqual(self.limiter.active, 0)
+
+    #sprawdza, czy request czekajacy dluzej niz timeout dostaje 503
+    async def test_queue_timeout_returns_503(self):
+        async with self._client("* *=1/1", timeout=0.05) as client:
+            active = asyncio.create_task(client.get("/slow"))
+            await _wait_for(lambda: self.limiter.active == 1)
+
+            self._assert_rejected(await client.get("/slow"), 503)
+            self.app.gate.set()
+            self.assertEqual((await active).status_code, 200)
+
+    #sprawdza, czy sciezki wylaczone i metody bez reguly omijaja limit
+    async def test_exempt_paths_and_unmatched_methods(self):
+        async with self._client("* GET=1/0", timeout=0.05) as client:
+            active = asyncio.create_task(client.get("/slow"))
+            await _wait_for(lambda: self.limiter.active == 1)
+
+            self._assert_rejected(await client.get("/slow"), 429)
+            self.assertEqual((await client.get("/fast")).status_code, 200)
+            self.app.gate.set()
+            self.assertEqual((await client.post("/slow")).status_code, 200)
+            self.assertEqual((await active).status_code, 200)
+
+
+#parsowanie ADMISSION_LIMITS i wybor najbardziej szczegolowej reguly
+class TestAdmissionRules(unittest.TestCase):
+
+    #sprawdza, czy regula routera ma pierwszenstwo przed *, a metoda przed *
+    def test_most_specific_rule_wins(self):
+        control = AdmissionControl(parse_admission_limits("* *=9/9, * GET=8/8, /tasks *=2/2, /tasks/ PUT=1/1"), 1, ())
+        self.assertEqual(control.limiter_for("PUT", "/tasks/5").name, "/tasks PUT")
+        self.assertEqual(control.limiter_for("GET", "/tasks/").name, "/tasks *")
+        self.assertEqual(control.limiter_for("GET", "/users/1").name, "* GET")
+        self.assertEqual(control.limiter_for("DELETE", "/users/1").name, "* *")
+
+    #sprawdza, czy bledna regula konczy sie czytelnym bledem
+    def test_invalid_rule(self):
+        with self.assertRaises(ValueError):
+            parse_admission_limits("/tasks=5")
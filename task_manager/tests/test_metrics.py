@@ -0,0 +1,68 @@
+import os
+import unittest
+
+from sqlalchemy import text
+
+from tests import TEST_DIR
+from app.db import _async_url, _create_engine
+from app.metrics import db_statement_rows, db_statement_rows_unknown, statement_label
+
+
+def _count(counter, statement: str) -> float:
+    return counter._values.get((statement_label(statement),), 0)
+
+
+#liczba wierszy zapytan zwracajacych wiersze pochodzi z prywatnego bufora adapterow SQLAlchemy
+#(_rows) - testy pilnuja, ze po aktualizacji SQLAlchemy dalej jest liczona, a nie gubiona
+class TestStatementRows(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.path = os.path.join(TEST_DIR, "metrics.db")
+        self.engine = _create_engine(_async_url(f"sqlite:///{self.path}"), 1)
+        async with self.engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE metric_rows (id INTEGER PRIMARY KEY, name TEXT)"))
+            await conn.execute(text("INSERT INTO metric_rows (name) VALUES ('a'), ('b'), ('c')"))
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+        os.remove(self.path)
+
+    #sprawdza, czy SELECT liczy zwrocone wiersze (rowcount w SQLite wynosi -1)
+    async def test_select_counts_returned_rows(self):
+        statement = "SELECT id FROM metric_rows WHERE id <= 2"
+        rows, unknown = _count(db_statement_rows, statement), _count(db_statement_rows_unknown, statement)
+        async with self.engine.connect() as conn:
+            self.assertEqual(len((await conn.execute(text(statement))).all()), 2)
+        self.assertEqual(_count(db_statement_rows, statement) - rows, 2)
+        self.assertEqual(_count(db_statement_rows_unknown, statement), unknown)
+
+    #sprawdza, czy zapis z RETURNING liczy zwrocone wiersze
+    async def test_returning_counts_rows(self):
+        statement = "UPDATE metric_rows SET name = 'x' RETURNING id"
+        before = _count(db_statement_rows, statement)
+        async with self.engine.begin() as conn:
+            await conn.execute(text(statement))
+        self.assertEqual(_count(db_statement_rows, statement) - before, 3)
+
+    #sprawdza, czy zapis bez RETURNING liczy zmienione wiersze (rowcount)
+    async def test_write_counts_rowcount(self):
+        statement = "DELETE FROM metric_rows WHERE id > 1"
+        before = _count(db_statement_rows, statement)
+        async with self.engine.begin() as conn:
+            await conn.execute(text(statement))
+        self.assertEqual(_count(db_statement_rows, statement) - before, 2)
+
+    #sprawdza, czy zapytanie strumieniowe jest eksportowane jako nieznana liczba wierszy
+    async def test_streamed_rows_are_unknown(self):
+        statement = "SELECT name FROM metric_rows"
+        rows, unknown = _count(db_statement_rows, statement), _count(db_statement_rows_unknown, statement)
+        async with self.engine.connect() as conn:
+            result = await conn.stream(text(statement))
+            self.assertEqual(len(await result.all()), 3)
+        self.assertEqual(_count(db_statement_rows, statement), rows)
+        self.assertEqual(_count(db_statement_rows_unknown, statement) - unknown, 1)
+
+    #sprawdza, czy kursor asyncpg dalej ma bufor wyniku (bez serwera Postgresa w testach)
+    def test_asyncpg_cursor_has_result_buffer(self):
+        from sqlalchemy.dialects.postgresql.asyncpg import AsyncAdapt_asyncpg_cursor
+        self.assertIn("_rows", AsyncAdapt_asyncpg_cursor.__slots__)
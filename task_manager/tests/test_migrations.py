@@ -0,0 +1,59 @@
+import os
+import sqlite3
+import unittest
+
+from sqlalchemy import inspect, text
+
+from tests import TEST_DIR
+from app.db import _async_url, _create_engine
+from app.migrations import LATEST_VERSION, run_migrations
+
+#schemat bazy sprzed wersjonowania (jak ./test.db w repozytorium) - bez kolumn version i schema_version
+_LEGACY_SCHEMA = """
+CREATE TABLE users (id INTEGER NOT NULL, name VARCHAR NOT NULL, email VARCHAR NOT NULL,
+    password VARCHAR NOT NULL, PRIMARY KEY (id), UNIQUE (email));
+CREATE TABLE projects (id INTEGER NOT NULL, name VARCHAR NOT NULL, description TEXT, PRIMARY KEY (id));
+CREATE TABLE tasks (id INTEGER NOT NULL, title VARCHAR NOT NULL, description TEXT, status VARCHAR,
+    user_id INTEGER, project_id INTEGER, PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE SET NULL,
+    FOREIGN KEY(project_id) REFERENCES projects (id) ON DELETE SET NULL);
+INSERT INTO users VALUES (1, 'u', 'u@example.com', 'secret');
+INSERT INTO projects VALUES (1, 'p', NULL);
+INSERT INTO tasks VALUES (1, 't', NULL, 'todo', 1, 1);
+"""
+
+
+class TestMigrations(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.path = os.path.join(TEST_DIR, "legacy.db")
+        with sqlite3.connect(self.path) as connection:
+            connection.executescript(_LEGACY_SCHEMA)
+        self.engine = _create_engine(_async_url(f"sqlite:///{self.path}"), 1)
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+        os.remove(self.path)
+
+    #sprawdza, czy stara baza dostaje kolumny version (bez nich GET list i po id konczyly sie 500)
+    async def test_upgrade_adds_version_columns(self):
+        version, applied = await run_migrations(self.engine)
+        self.assertEqual(version, LATEST_VERSION)
+        self.assertEqual(len(applied), LATEST_VERSION)
+        async with self.engine.connect() as conn:
+            for table in ("users", "projects", "tasks"):
+                columns = await conn.run_sync(lambda sync: [c["name"] for c in inspect(sync).get_columns(table)])
+                self.assertIn("version", columns)
+                self.assertEqual((await conn.execute(text(f"SELECT version FROM {table}"))).scalar(), 1)
+
+    #sprawdza, czy liczniki projektu sa przeliczone z istniejacych taskow
+    async def test_upgrade_backfills_task_counts(self):
+        await run_migrations(self.engine)
+        async with self.engine.connect() as conn:
+            rows = (await conn.execute(text("SELECT project_id, status, count FROM project_task_counts"))).all()
+        self.assertEqual([tuple(row) for row in rows], [(1, "todo", 1)])
+
+    #sprawdza, czy drugi start nie uruchamia juz migracji
+    async def test_second_run_is_noop(self):
+        await run_migrations(self.engine)
+        self.assertEqual(await run_migrations(self.engine), (LATEST_VERSION, []))
@@ -0,0 +1,47 @@
+from tests import AppTestCase, unique
+from app.profiling import profile_queries
+
+#budzety zapytan SQL per endpoint - wzrost liczby zapytan (np. N+1 po zmianie w serwisie) psuje test
+
+
+class TestQueryBudgets(AppTestCase):
+
+    async def _count_queries(self, method: str, path: str, **kwargs) -> int:
+        with profile_queries() as profile:
+            response = await self.client.request(method, path, **kwargs)
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(profile.repeated(), {}, path)
+        return profile.count
+
+    #sprawdza, czy lista taskow z relacjami kosztuje tyle samo zapytan dla 1 i dla 10 taskow
+    async def test_task_list_does_not_grow_with_page(self):
+        project = (await self.client.post("/projects/", json={"name": unique("budget")})).json()
+        for number in range(10):
+            response = await self.client.post("/users/", json={
+                "name": "u", "email": f"{unique('budget')}@example.com", "password": "secret123",
+            })
+            self.assertEqual(response.status_code, 200, response.text)
+            response = await self.client.post("/tasks/", json={
+                "title": f"t{number}", "project_id": project["id"], "user_id": response.json()["id"],
+            })
+            self.assertEqual(response.status_code, 200, response.text)
+
+        path = f"/tasks/?project_id={project['id']}&expand=user,project"
+        #ETag strony + sama strona z relacjami
+        self.assertEqual(await self._count_queries("GET", path + "&limit=1"), 2)
+        self.assertEqual(await self._count_queries("GET", path + "&limit=10"), 2)
+
+    #sprawdza budzety pojedynczego taska, projektu i edycji z wersja
+    async def test_single_resource_budgets(self):
+        task = await self.create_task()
+        project_id = task["project"]["id"]
+        #ETag z wersji + odczyt taska z relacjami
+        self.assertEqual(await self._count_queries("GET", f"/tasks/{task['id']}?expand=project"), 2)
+        #wersja z bazy, projekt z cache przy drugim odczycie
+        await self._count_queries("GET", f"/projects/{project_id}")
+        self.assertEqual(await self._count_queries("GET", f"/projects/{project_id}"), 1)
+        #statystyki z tabeli licznikow
+        self.assertEqual(await self._count_queries("GET", f"/projects/{project_id}/stats"), 1)
+        #UPDATE ... RETURNING + relacje odpowiedzi
+        self.assertEqual(await self._count_queries(
+            "PUT", f"/tasks/{task['id']}", json={"title": "budget", "version": task["version"]}), 2)
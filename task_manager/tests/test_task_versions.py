@@ -0,0 +1,50 @@
+import asyncio
+
+from tests import AppTestCase
+
+#optymistyczna blokada taskow: zapis z nieaktualna wersja konczy sie 409
+CONCURRENT_WRITES = 8
+
+
+class TestTaskVersions(AppTestCase):
+
+    #sprawdza, czy z N rownoleglych edycji tej samej wersji przechodzi dokladnie jedna
+    async def test_concurrent_updates_with_same_version(self):
+        task = await self.create_task()
+        responses = await asyncio.gather(*(
+            self.client.put(f"/tasks/{task['id']}", json={"title": f"edit {i}", "version": task["version"]})
+            for i in range(CONCURRENT_WRITES)
+        ))
+        statuses = sorted(response.status_code for response in responses)
+        self.assertEqual(statuses, [200] + [409] * (CONCURRENT_WRITES - 1))
+        current = (await self.client.get(f"/tasks/{task['id']}")).json()
+        self.assertEqual(current["version"], task["version"] + 1)
+        winner = next(response.json() for response in responses if response.status_code == 200)
+        self.assertEqual(current["title"], winner["title"])
+
+    #sprawdza to samo dla zmiany statusu z parametrem version
+    async def test_concurrent_status_changes_with_same_version(self):
+        task = await self.create_task()
+        responses = await asyncio.gather(*(
+            self.client.put(f"/tasks/{task['id']}/status/", params={"status": f"s{i}", "version": task["version"]})
+            for i in range(CONCURRENT_WRITES)
+        ))
+        self.assertEqual(sorted(r.status_code for r in responses), [200] + [409] * (CONCURRENT_WRITES - 1))
+
+    #sprawdza, czy nieaktualna wersja to 409, a brak taska to 404 (takze z wersja)
+    async def test_stale_version_and_missing_task(self):
+        task = await self.create_task()
+        first = await self.client.put(f"/tasks/{task['id']}", json={"title": "a", "version": task["version"]})
+        self.assertEqual(first.status_code, 200)
+        stale = await self.client.put(f"/tasks/{task['id']}", json={"title": "b", "version": task["version"]})
+        self.assertEqual(stale.status_code, 409)
+        missing = await self.client.put("/tasks/999999", json={"title": "c", "version": 1})
+        self.assertEqual(missing.status_code, 404)
+
+    #sprawdza, czy zapis bez wersji dalej dziala bez sprawdzania (zgodnosc wstecz)
+    async def test_update_without_version(self):
+        task = await self.create_task()
+        for title in ("a", "b"):
+            response = await self.client.put(f"/tasks/{task['id']}", json={"title": title})
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["version"], task["version"] + 2)
@@ -0,0 +1,51 @@
+import unittest
+
+from app.services.users_service import _iter_import_rows
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def _rows(data: bytes, is_csv: bool = True, size: int = 5) -> list:
+    return [row async for row in _iter_import_rows(_chunks(data, size), is_csv)]
+
+
+class TestImportRows(unittest.IsolatedAsyncioTestCase):
+
+    #sprawdza, czy pole w cudzyslowie ze znakiem nowej linii jest jednym wierszem
+    async def test_csv_quoted_newline_is_one_row(self):
+        rows = await _rows(b'name,email,password\n"Two\nlines",a@x.com,pw\nok,b@x.com,pw\n')
+        self.assertEqual(rows, [
+            (1, {"name": "Two\nlines", "email": "a@x.com", "password": "pw"}),
+            (2, {"name": "ok", "email": "b@x.com", "password": "pw"}),
+        ])
+
+    #sprawdza, czy cudzyslow wewnatrz pola bez cudzyslowow nie skleja kolejnych wierszy
+    async def test_csv_literal_quote_in_unquoted_field(self):
+        rows = await _rows(b'name,email,password\nab"c,a@x.com,pw\nok,b@x.com,pw\n')
+        self.assertEqual([row["name"] for _, row in rows], ['ab"c', "ok"])
+
+    #sprawdza, czy niezamkniety cudzyslow na koncu pliku to blad wiersza, a nie wyjatek
+    async def test_csv_unterminated_quote_is_row_error(self):
+        rows = await _rows(b'name,email,password\nok,a@x.com,pw\n"open,b@x.com,pw\n')
+        self.assertEqual(rows[0][0], 1)
+        self.assertEqual(rows[1][0], 2)
+        self.assertIsInstance(rows[1][1], str)
+
+    #sprawdza, czy znak UTF-8 podzielony miedzy paczki jest poprawnie zdekodowany,
+    #a bledne bajty odrzucaja tylko swoj wiersz
+    async def test_utf8_split_and_invalid_bytes(self):
+        data = "name,email,password\nZoë,a@x.com,pw\n".encode() + b"B\xffd,b@x.com,pw\n"
+        for size in range(1, 8):
+            rows = await _rows(data, size=size)
+            self.assertEqual(rows[0], (1, {"name": "Zoë", "email": "a@x.com", "password": "pw"}))
+            self.assertEqual(rows[1], (2, "Invalid UTF-8"))
+
+    #sprawdza, czy NDJSON raportuje bledny JSON per wiersz
+    async def test_ndjson_rows(self):
+        rows = await _rows(b'{"name": "a"}\n\nnot json\n', is_csv=False)
+        self.assertEqual(rows[0], (1, {"name": "a"}))
+        self.assertEqual(rows[1][0], 2)
+        self.assertIsInstance(rows[1][1], str)
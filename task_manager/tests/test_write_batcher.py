@@ -0,0 +1,111 @@
+import asyncio
+
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from tests import AppTestCase, unique
+from app.db import AsyncSessionLocal
+from app.models.projects import Project
+from app.models.user import User
+from app.services.write_batcher import WriteBatcher, write_batcher
+
+
+def _create_project(name: str):
+    async def operation(db):
+        return (await db.execute(insert(Project).values(name=name).returning(Project.id))).scalar()
+    return operation
+
+
+def _create_user(email: str):
+    async def operation(db):
+        result = await db.execute(insert(User).values(name="u", email=email, password="x").returning(User.id))
+        return result.scalar()
+    return operation
+
+
+async def _not_found(db):
+    raise HTTPException(status_code=404, detail="Task not found")
+
+
+async def _project_names(ids) -> set:
+    async with AsyncSessionLocal() as db:
+        return set((await db.execute(select(Project.name).where(Project.id.in_(ids)))).scalars())
+
+
+#grupowy commit: kazdy wywolujacy dostaje wlasny wynik albo wlasny blad,
+#a blad jednej operacji nie cofa zapisow pozostalych
+class TestWriteBatcher(AppTestCase):
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        #dlugie okno - wszystkie operacje testu trafiaja do jednej paczki
+        self.batcher = WriteBatcher(window=0.2, max_batch=100)
+        self.batcher.start()
+
+    async def asyncTearDown(self):
+        await self.batcher.stop()
+        await super().asyncTearDown()
+
+    async def _submit_all(self, operations: list) -> list:
+        return await asyncio.gather(*(self.batcher.submit(op) for op in operations), return_exceptions=True)
+
+    #sprawdza, czy blad aplikacji (404) trafia tylko do swojego wywolujacego, a paczka jest jedna
+    async def test_application_error_fails_only_its_caller(self):
+        names = [unique("batch") for _ in range(4)]
+        results = await self._submit_all([_create_project(names[0]), _create_project(names[1]), _not_found,
+                                           _create_project(names[2]), _create_project(names[3])])
+        self.assertIsInstance(results[2], HTTPException)
+        ids = [result for i, result in enumerate(results) if i != 2]
+        self.assertTrue(all(isinstance(result, int) for result in ids))
+        self.assertEqual(await _project_names(ids), set(names))
+        self.assertEqual((self.batcher.batches, self.batcher.operations), (1, 5))
+
+    #sprawdza, czy blad bazy (duplikat emaila) powoduje powtorke operacji osobno:
+    #zla operacja dostaje IntegrityError, pozostale sa zapisane
+    async def test_database_error_replays_operations_individually(self):
+        email = f"{unique('dup')}@example.com"
+        names = [unique("replay") for _ in range(3)]
+        results = await self._submit_all([_create_project(names[0]), _create_user(email), _create_user(email),
+                                           _create_project(names[1]), _create_project(names[2])])
+        self.assertIsInstance(results[1], int)
+        self.assertIsInstance(results[2], IntegrityError)
+        ids = [results[0], results[3], results[4]]
+        self.assertEqual(await _project_names(ids), set(names))
+        #paczka cofnieta, 4 udane operacje zatwierdzone pojedynczo
+        self.assertEqual((self.batcher.batches, self.batcher.operations), (4, 4))
+
+    #sprawdza, czy operacja, na ktora nikt juz nie czeka (anulowany request), nie jest wykonywana
+    async def test_cancelled_caller_is_skipped(self):
+        name = unique("cancelled")
+        waiter = asyncio.create_task(self.batcher.submit(_create_project(name)))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        other = await self.batcher.submit(_create_project(unique("kept")))
+        self.assertIsInstance(other, int)
+        async with AsyncSessionLocal() as db:
+            self.assertIsNone((await db.execute(select(Project.id).where(Project.name == name))).scalar())
+
+
+#ten sam kontrakt przez API: rownolegle edycje z ta sama wersja w jednej paczce
+class TestBatchedTaskWrites(AppTestCase):
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        write_batcher.start()
+
+    async def asyncTearDown(self):
+        await write_batcher.stop()
+        await super().asyncTearDown()
+
+    #sprawdza, czy 409 i 404 w paczce nie psuja zapisu, ktory przeszedl
+    async def test_conflicts_in_one_batch(self):
+        task = await self.create_task()
+        responses = await asyncio.gather(
+            *(self.client.put(f"/tasks/{task['id']}", json={"title": f"t{i}", "version": task["version"]})
+              for i in range(5)),
+            self.client.put("/tasks/999999", json={"title": "missing"}),
+        )
+        self.assertEqual(sorted(r.status_code for r in responses), [200, 404, 409, 409, 409, 409])
+        current = (await self.client.get(f"/tasks/{task['id']}")).json()
+        self.assertEqual(current["version"], task["version"] + 1)